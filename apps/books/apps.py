@@ -1,5 +1,42 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, pre_migrate
+
+
+def install_search_index(sender, using, plan=None, **kwargs):
+    """
+    Create or repair the catalog search index after every migrate run, and
+    empty it after a flush.
+    """
+    from django.db import connections
+
+    from apps.books.models import Book
+    from apps.books.search import get_search_backend
+
+    # Partial migrate runs can leave the books table unmigrated
+    if Book._meta.db_table not in connections[using].introspection.table_names():
+        return
+
+    backend = get_search_backend(using)
+    backend.install(using)
+    # flush sends post_migrate without a plan. The books table is empty then,
+    # and an index that missed a delete would return stale rows for the ids
+    # new books reuse
+    if plan is None:
+        backend.clear(using)
+
+
+def pin_migrations_to_primary(sender, **kwargs):
+    """
+    Keep data migrations from reading book rows off a replica.
+    """
+    from library_mgmt.routers import pin_to_primary
+
+    pin_to_primary()
 
 
 class BooksConfig(AppConfig):
     name = 'apps.books'
+
+    def ready(self):
+        pre_migrate.connect(pin_migrations_to_primary, sender=self)
+        post_migrate.connect(install_search_index, sender=self)
@@ -0,0 +1,46 @@
+class BookNotFoundError(ValueError):
+    """
+    Raised when a book id does not match any book.
+    """
+
+
+class BookNotAvailableError(ValueError):
+    """
+    Raised when a book cannot be claimed because it is already borrowed.
+    """
+
+
+class BatchConflictError(ValueError):
+    """
+    Raised when rows read by a batch change before it can claim them.
+    """
+
+
+class InvalidISBNError(ValueError):
+    """
+    Raised when a value is not a valid ISBN-10 or ISBN-13.
+    """
+
+
+class LoanNotBorrowedError(ValueError):
+    """
+    Raised when closing a loan that is no longer open.
+    """
+
+
+class BookAvailableError(ValueError):
+    """
+    Raised when placing a hold on a book that has a copy on the shelf.
+    """
+
+
+class HoldExistsError(ValueError):
+    """
+    Raised when a patron already waits in the queue for a book.
+    """
+
+
+class HoldNotWaitingError(ValueError):
+    """
+    Raised when cancelling a hold that is no longer waiting.
+    """
@@ -0,0 +1,91 @@
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.books.models import Book, Loan
+
+
+BOOK_EXPORT_FIELDS = (
+    'id', 'title', 'author', 'isbn', 'page_count', 'total_copies', 'available_copies', 'is_available',
+    'description', 'created_at', 'updated_at'
+)
+LOAN_EXPORT_FIELDS = (
+    'id', 'book_id', 'user_id', 'borrowed_at', 'due_date', 'returned_at', 'fine_amount', 'status',
+    'created_at', 'updated_at'
+)
+
+EXPORTS = {
+    'books': (Book, BOOK_EXPORT_FIELDS),
+    'loans': (Loan, LOAN_EXPORT_FIELDS),
+}
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class _Echo:
+    """
+    File-like object whose write() hands the line straight back to csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def parse_since(value: str):
+    """
+    Parse an ISO 8601 `since` value, reading one without an offset in the
+    current time zone. Returns None if it is not a valid datetime.
+    """
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        # Well-formed but impossible, such as month 13
+        return None
+    if since is not None and settings.USE_TZ and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def export_queryset(name: str, since=None):
+    """
+    Get the (queryset, fields) pair for an export, optionally limited to rows
+    updated at or after `since`.
+    """
+    model, fields = EXPORTS[name]
+    queryset = model.objects.order_by('id')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset.values_list(*fields), fields
+
+
+def stream_rows(queryset, fields: tuple, fmt: str, chunk_size: int = 2000):
+    """
+    Yield the export as text chunks of about `chunk_size` rows.
+
+    Rows come from QuerySet.iterator(), so memory stays flat however large
+    the table is, and the first chunk is ready after the first fetch.
+    """
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        encode = writer.writerow
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+        def encode(row):
+            return encoder.encode(dict(zip(fields, row))) + '\n'
+
+    buffer = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        buffer.append(encode(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,44 @@
+import re
+
+from apps.books.exceptions import InvalidISBNError
+
+
+# Scanners and catalog exports add hyphens and spaces freely
+SEPARATORS_RE = re.compile(r'[\s-]')
+
+
+def isbn10_check_digit(digits: str) -> str:
+    """
+    Compute the ISBN-10 check digit for the first nine digits.
+    """
+    total = sum((10 - i) * int(digit) for i, digit in enumerate(digits))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def isbn13_check_digit(digits: str) -> str:
+    """
+    Compute the ISBN-13 check digit for the first twelve digits.
+    """
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(digits))
+    return str((10 - total % 10) % 10)
+
+
+def normalize_isbn(value: str) -> str:
+    """
+    Canonicalize an ISBN-10 or ISBN-13 to a bare 13-digit ISBN-13.
+    """
+    isbn = SEPARATORS_RE.sub('', str(value)).upper()
+
+    if len(isbn) == 10 and isbn[:9].isdigit() and (isbn[9].isdigit() or isbn[9] == 'X'):
+        if isbn10_check_digit(isbn[:9]) != isbn[9]:
+            raise InvalidISBNError(f"Invalid ISBN-10 check digit: {value}")
+        isbn = '978' + isbn[:9]
+        return isbn + isbn13_check_digit(isbn)
+
+    if len(isbn) == 13 and isbn.isdigit():
+        if isbn13_check_digit(isbn[:12]) != isbn[12]:
+            raise InvalidISBNError(f"Invalid ISBN-13 check digit: {value}")
+        return isbn
+
+    raise InvalidISBNError(f"Invalid ISBN: {value}")
@@ -0,0 +1,61 @@
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.books.models import Loan, overdue_fine
+
+
+class Command(BaseCommand):
+    help = 'Assess overdue fines on every open loan with set-based UPDATEs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Assess as of this date, YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['date']:
+            today = parse_date(options['date'])
+            if today is None:
+                raise CommandError(f"Invalid --date: {options['date']}")
+
+        started = time.monotonic()
+        touched = 0
+        statements = 0
+
+        # The fine depends only on the due date, so every loan sharing a due
+        # date gets the same amount: one UPDATE per distinct date, served by
+        # the (status, due_date) index, instead of one per loan
+        overdue = Loan.objects.filter(status='borrowed', due_date__lt=today)
+
+        rate = settings.CIRCULATION['FINE_PER_DAY']
+        cap = settings.CIRCULATION['MAX_OVERDUE_FINE']
+        if cap and rate:
+            # Every loan at least this late has reached the cap
+            capped_on = today - timedelta(days=math.ceil(cap / rate))
+            with transaction.atomic():
+                touched += overdue.filter(due_date__lte=capped_on).exclude(fine_amount=cap).update(
+                    fine_amount=cap, updated_at=timezone.now()
+                )
+            statements += 1
+            overdue = overdue.filter(due_date__gt=capped_on)
+
+        due_dates = overdue.order_by('due_date').values_list('due_date', flat=True).distinct()
+        for due_date in due_dates:
+            fine = overdue_fine((today - due_date).days)
+            with transaction.atomic():
+                # Skipping rows that already hold the amount keeps reruns cheap
+                touched += overdue.filter(due_date=due_date).exclude(fine_amount=fine).update(
+                    fine_amount=fine, updated_at=timezone.now()
+                )
+            statements += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Assessed fines as of {today}: {touched} loans updated with {statements} statements "
+            f"in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,284 @@
+import json
+import platform
+import random
+import resource
+import statistics
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from apps.books.isbn import isbn13_check_digit
+from apps.books.models import Book, Loan
+from library_mgmt.benchmarking import compare_to_baseline, percentile
+from library_mgmt.metrics import QueryTimer
+
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+BATCH_SIZE = 5_000
+STAFF_USERNAME = 'bench-staff'
+PASSWORD = 'bench-Passw0rd!'
+# Seeded books use the 978 prefix, books added during a run 979
+SEEDED_PREFIX, ADDED_PREFIX = '978', '979'
+
+
+def isbn(prefix: str, number: int) -> str:
+    digits = f"{prefix}{number:09d}"
+    return digits + isbn13_check_digit(digits)
+
+
+def seed_catalog(books: int, stdout):
+    """
+    Fill an empty database with `books` books, a user per hundred books and
+    a loan per four books, half of them still out. Deterministic for a size.
+    """
+    rng = random.Random(books)
+    users = max(100, books // 100)
+    loans = books // 4
+    password = make_password(PASSWORD)
+
+    started = time.monotonic()
+    User.objects.bulk_create(
+        [User(username=f"bench-member-{n}", email=f"member{n}@example.com", password=password) for n in range(users)],
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+
+    # Loan i is on book 2i; the even ones are still borrowed
+    for start in range(0, books, BATCH_SIZE):
+        Book.objects.bulk_create([
+            Book(
+                title=f"Book {i} {rng.choice(('of', 'and', 'in'))} the {rng.choice(('sea', 'stars', 'city', 'past'))}",
+                author=f"Author {i % 5_000}", isbn=isbn(SEEDED_PREFIX, i), page_count=100 + i % 900,
+                description=f"Synthetic benchmark book number {i}.", total_copies=3,
+                available_copies=2 if i % 4 == 0 and i < 2 * loans else 3,
+            )
+            for i in range(start, min(start + BATCH_SIZE, books))
+        ])
+    book_ids = dict(Book.objects.filter(isbn__startswith=SEEDED_PREFIX).values_list('isbn', 'id'))
+
+    for start in range(0, loans, BATCH_SIZE):
+        Loan.objects.bulk_create([
+            Loan(
+                book_id=book_ids[isbn(SEEDED_PREFIX, 2 * i)], user_id=rng.choice(user_ids),
+                status='borrowed' if i % 2 == 0 else 'returned',
+            )
+            for i in range(start, min(start + BATCH_SIZE, loans))
+        ])
+    stdout.write(f"Seeded {books:,} books, {users:,} users and {loans:,} loans in {time.monotonic() - started:.1f}s")
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the API endpoints in-process against a seeded synthetic catalog and report latency, '
+        'queries per request and peak memory; fails when results regress against the stored baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='10k', help='Synthetic catalog size')
+        parser.add_argument('--iterations', type=int, default=200, help='Measured requests per endpoint')
+        parser.add_argument(
+            '--auth-iterations', type=int, default=20,
+            help='Measured requests for register and login, which are dominated by password hashing',
+        )
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per endpoint')
+        parser.add_argument('--memory-iterations', type=int, default=10, help='Requests traced for peak memory')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the seeded database for the next run')
+        parser.add_argument('--output', help='Results file (default: benchmarks/results-<size>.json)')
+        parser.add_argument('--baseline', help='Baseline file (default: benchmarks/baseline-<size>.json)')
+        parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed latency and memory growth')
+
+    def handle(self, *args, **options):
+        directory = Path(settings.BASE_DIR) / 'benchmarks'
+        output = Path(options['output'] or directory / f"results-{options['size']}.json")
+        baseline_path = Path(options['baseline'] or directory / f"baseline-{options['size']}.json")
+        books = SIZES[options['size']]
+
+        # A database of its own, so seeding never touches real data
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = str(Path(settings.BASE_DIR) / f"bench_{options['size']}.sqlite3")
+        else:
+            test_settings['NAME'] = f"{connection.settings_dict['NAME']}_bench_{options['size']}"
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb'], serialized_aliases=set(),
+        )
+        try:
+            if Book.objects.filter(isbn__startswith=SEEDED_PREFIX).count() != books:
+                seed_catalog(books, self.stdout)
+            results = self._run(books, options)
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        for name, result in results['endpoints'].items():
+            self.stdout.write(
+                f"{name:<9} p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                f"queries={result['queries_per_request']:.2f} peak={result['peak_memory_kib']:.0f}KiB "
+                f"errors={result['errors']}"
+            )
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        self.stdout.write(f"Results written to {output}")
+
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline stored at {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            # Fail rather than pass vacuously, so CI notices a missing baseline
+            raise CommandError(f"No baseline at {baseline_path}; record one with --save-baseline")
+
+        baseline = json.loads(baseline_path.read_text())
+        if baseline['meta']['books'] != books:
+            raise CommandError(f"Baseline {baseline_path} was recorded with {baseline['meta']['books']:,} books")
+        regressions = compare_to_baseline(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
+
+    def _run(self, books: int, options: dict) -> dict:
+        """
+        Measure every endpoint and return the results document.
+        """
+        staff, created = User.objects.get_or_create(username=STAFF_USERNAME, defaults={'is_staff': True})
+        if created:
+            staff.set_password(PASSWORD)
+            staff.save()
+        client = Client()
+        body = self._post(client, '/api/users/login/', {"username": STAFF_USERNAME, "password": PASSWORD}).json()
+        headers = {"Authorization": f"Bearer {body['data']['access_token']}"}
+        refresh_tokens = [body['data']['refresh_token']]
+
+        # Books the staff user can borrow: not already on loan to them
+        borrowed = Loan.objects.filter(user=staff, status='borrowed').values_list('book_id', flat=True)
+        loanable = list(
+            Book.objects.filter(isbn__startswith=SEEDED_PREFIX, available_copies__gt=0)
+            .exclude(id__in=borrowed).order_by('?').values_list('id', flat=True)[:2_000]
+        )
+        loan_ids, added_ids = [], []
+
+        def book_list():
+            return client.get('/api/books/list/', headers=headers)
+
+        def add():
+            response = self._post(client, '/api/books/add/', {
+                "title": "Benchmark addition", "author": "Bench", "isbn": isbn(ADDED_PREFIX, random.randrange(10 ** 9)),
+                "page_count": 123, "description": "Added by bench_api.", "total_copies": 1,
+            }, headers)
+            if response.status_code in (200, 201):
+                added_ids.append(response.json()['data']['book']['id'])
+            return response
+
+        def loan():
+            response = self._post(client, '/api/books/loan/', {"book_id": loanable.pop()}, headers)
+            if response.status_code == 200:
+                loan_ids.append(response.json()['data']['loan']['id'])
+            return response
+
+        def return_():
+            return self._post(client, '/api/books/return/', {"loan_id": loan_ids.pop()}, headers)
+
+        def register():
+            username = f"bench-register-{uuid.uuid4().hex[:12]}"
+            return self._post(client, '/api/users/register/', {
+                "username": username, "password": PASSWORD, "password2": PASSWORD,
+                "email": f"{username}@example.com", "first_name": "Bench", "last_name": "Mark",
+            })
+
+        def login():
+            return self._post(client, '/api/users/login/', {"username": STAFF_USERNAME, "password": PASSWORD})
+
+        def refresh():
+            # Rotation blacklists the old token, so chain the returned one
+            response = self._post(client, '/api/users/token/refresh/', {"refresh": refresh_tokens[-1]})
+            if response.status_code == 200:
+                refresh_tokens.append(response.json()['refresh'])
+            return response
+
+        endpoints = (
+            ('list', book_list, options['iterations']),
+            ('add', add, options['iterations']),
+            ('loan', loan, options['iterations']),
+            ('return', return_, options['iterations']),
+            ('register', register, options['auth_iterations']),
+            ('login', login, options['auth_iterations']),
+            ('refresh', refresh, options['iterations']),
+        )
+        try:
+            results = {name: self._measure(send, iterations, options) for name, send, iterations in endpoints}
+        finally:
+            Book.objects.filter(id__in=added_ids).delete()
+
+        return {
+            "meta": {
+                "books": books,
+                "iterations": options['iterations'],
+                "auth_iterations": options['auth_iterations'],
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "recorded_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            },
+            "endpoints": results,
+        }
+
+    def _post(self, client: Client, path: str, data: dict, headers: dict = None):
+        return client.post(path, data=json.dumps(data), content_type='application/json', headers=headers or {})
+
+    def _measure(self, send, iterations: int, options: dict) -> dict:
+        """
+        Time `iterations` requests after a warm-up, counting their queries,
+        then trace a few more for peak Python memory; tracing slows requests
+        down too much to do both at once.
+        """
+        errors = 0
+        for _ in range(options['warmup']):
+            send()
+
+        latencies, queries = [], []
+        for _ in range(iterations):
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = send()
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(timer.count)
+            errors += response.status_code >= 400
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for _ in range(options['memory_iterations']):
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                send()
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "requests": iterations,
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries_per_request": round(statistics.fmean(queries), 2),
+            "peak_memory_kib": round(peak / 1024, 1),
+        }
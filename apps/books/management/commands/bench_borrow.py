@@ -0,0 +1,127 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_databases, teardown_databases
+
+from apps.books.exceptions import BookNotAvailableError
+from apps.books.management.commands.bench_api import ADDED_PREFIX, isbn
+from apps.books.models import Book
+from apps.books.services import BookBorrowService
+from library_mgmt.benchmarking import percentile
+
+
+BENCH_PREFIX = 'bench-borrow'
+
+
+def init_worker(database_name: str):
+    """
+    Point a worker process at the scratch database, also when it was spawned
+    rather than forked and so re-read the configured settings.
+    """
+    django.setup()
+    settings.DATABASES['default']['NAME'] = database_name
+
+
+def borrow_loop(user_id: int, book_ids: list, duration: float) -> dict:
+    """
+    Borrow and immediately return random books until the deadline.
+
+    Runs in a worker process, standing in for one gunicorn worker.
+    """
+    service = BookBorrowService()
+    result = {"borrows": 0, "conflicts": 0, "errors": 0, "latencies": []}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            loan = service.borrow_book(random.choice(book_ids), user_id)
+            service.return_book(loan['id'])
+            result["borrows"] += 1
+            result["latencies"].append((time.perf_counter() - started) * 1000)
+        except BookNotAvailableError:
+            result["conflicts"] += 1
+        except Exception:
+            result["errors"] += 1
+    connection.close()
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Measure borrow/return throughput of the configured database engine, in a scratch database, with several worker processes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Concurrent worker processes')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run')
+        parser.add_argument('--books', type=int, default=20, help='Scratch books to borrow from')
+        parser.add_argument('--copies', type=int, default=5, help='Copies of each scratch book')
+
+    def handle(self, *args, **options):
+        # A scratch database with the configured engine and options, so the
+        # run never writes to real data and leaves nothing behind
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if connection.vendor == 'sqlite':
+            # A file rather than memory, so the worker processes share it
+            test_settings['NAME'] = str(Path(settings.BASE_DIR) / 'bench_borrow.sqlite3')
+        else:
+            test_settings['NAME'] = f"{connection.settings_dict['NAME']}_bench_borrow"
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+        try:
+            database = connection.settings_dict
+            self.stdout.write(
+                f"Database: {database['ENGINE']} {database['NAME']} "
+                f"options={database.get('OPTIONS', {})} conn_max_age={database.get('CONN_MAX_AGE')}"
+            )
+            results = self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        latencies = [latency for result in results for latency in result["latencies"]]
+        borrows = sum(result["borrows"] for result in results)
+        conflicts = sum(result["conflicts"] for result in results)
+        errors = sum(result["errors"] for result in results)
+        if not latencies:
+            self.stdout.write(self.style.ERROR(f"No successful borrows ({errors} errors)"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{borrows / options['duration']:,.1f} borrow+return/sec with {options['workers']} workers, "
+            f"p50={percentile(latencies, 50):.1f}ms p99={percentile(latencies, 99):.1f}ms, "
+            f"{conflicts} conflicts, {errors} errors"
+        ))
+
+    def _run(self, options: dict) -> list:
+        """
+        Create scratch books and users, run the worker processes against
+        them and return each worker's result.
+        """
+        try:
+            Book.objects.bulk_create([
+                Book(
+                    title=f"{BENCH_PREFIX} {i}", author=BENCH_PREFIX, isbn=isbn(ADDED_PREFIX, i), page_count=1,
+                    description='', total_copies=options['copies'], available_copies=options['copies'],
+                )
+                for i in range(options['books'])
+            ])
+            book_ids = list(Book.objects.filter(author=BENCH_PREFIX).values_list('id', flat=True))
+            users = [User.objects.create(username=f"{BENCH_PREFIX}-{n}") for n in range(options['workers'])]
+
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=init_worker, initargs=(connection.settings_dict['NAME'],)
+            ) as executor:
+                futures = [
+                    executor.submit(borrow_loop, user.id, book_ids, options['duration']) for user in users
+                ]
+                return [future.result() for future in futures]
+        finally:
+            # Loans go with their books and users
+            Book.objects.filter(author=BENCH_PREFIX).delete()
+            User.objects.filter(username__startswith=f"{BENCH_PREFIX}-").delete()
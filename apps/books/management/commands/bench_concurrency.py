@@ -0,0 +1,81 @@
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library_mgmt.benchmarking import http_request, percentile
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput of running servers (e.g. WSGI and ASGI) under many concurrent connections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append', required=True, help='Base URL of a running server (repeatable)')
+        parser.add_argument('--username', required=True, help='Existing user to authenticate as')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--path', action='append', help='Endpoint to request (repeatable, default: book list)')
+        parser.add_argument('--connections', type=int, default=64, help='Concurrent client connections')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per server')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or ['/api/books/list/']
+        credentials = json.dumps({"username": options['username'], "password": options['password']}).encode()
+
+        for base_url in options['url']:
+            base_url = base_url.rstrip('/')
+            status_code, body, _ = http_request(
+                f"{base_url}/api/users/login/", data=credentials, headers={"Content-Type": "application/json"}
+            )
+            if status_code != 200:
+                raise CommandError(f"Login to {base_url} failed with HTTP {status_code}: {body[:200]}")
+            headers = {"Authorization": f"Bearer {json.loads(body)['data']['access_token']}"}
+
+            # One warm-up request per path so every worker's caches are primed
+            for path in paths:
+                http_request(f"{base_url}{path}", headers=headers)
+
+            result = self._run(base_url, paths, headers, options)
+            self.stdout.write(self._format(base_url, result, options['duration']))
+
+    def _run(self, base_url: str, paths: list, headers: dict, options: dict) -> dict:
+        """
+        Keep `connections` clients busy cycling through `paths` until the
+        deadline and collect latencies of successful responses.
+        """
+        deadline = time.monotonic() + options['duration']
+        result = {"latencies": [], "errors": 0}
+        lock = threading.Lock()
+
+        def client(offset: int):
+            i = offset
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    status_code, _, _ = http_request(f"{base_url}{paths[i % len(paths)]}", headers=headers)
+                except OSError:
+                    status_code = None
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if status_code == 200:
+                        result["latencies"].append(elapsed)
+                    else:
+                        result["errors"] += 1
+                i += 1
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options['connections'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def _format(self, base_url: str, result: dict, duration: float) -> str:
+        samples = result["latencies"]
+        if not samples:
+            return f"{base_url}: no successful requests ({result['errors']} errors)"
+        return (
+            f"{base_url}: {len(samples) / duration:,.0f} req/s, p50={statistics.median(samples):.1f}ms "
+            f"p99={percentile(samples, 99):.1f}ms, errors={result['errors']}"
+        )
@@ -0,0 +1,66 @@
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_databases, teardown_databases
+from rest_framework.renderers import JSONRenderer
+
+from apps.books.management.commands.bench_api import seed_catalog
+from apps.books.serializers import BookListSerializer, LoanSerializer, ValuesSerializer
+from apps.books.services import BookService, LoanService
+from library_mgmt.renderers import FastJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare serializing and rendering a list page through DRF serializers and through .values() with orjson.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=30, help='Timed renders per path')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # A scratch database, seeded with a loan per four books so both pages fill
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = (
+            str(Path(settings.BASE_DIR) / 'bench_render.sqlite3') if connection.vendor == 'sqlite' else None
+        )
+        old_config = setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+        try:
+            seed_catalog(4 * rows, self.stdout)
+            for name, serializer_class, queryset in (
+                ('books', BookListSerializer, BookService().get_book_list().order_by('-created_at', '-id')[:rows]),
+                ('loans', LoanSerializer, LoanService().get_loan_history().order_by('-borrowed_at', '-id')[:rows]),
+            ):
+                self._compare(name, serializer_class, queryset, options['repeat'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _compare(self, name: str, serializer_class, queryset, repeat: int):
+        values_serializer = ValuesSerializer(serializer_class)
+
+        def drf():
+            return JSONRenderer().render({"rows": serializer_class(list(queryset), many=True).data})
+
+        def fast():
+            return FastJSONRenderer().render({"rows": values_serializer.serialize(list(values_serializer.values(queryset)))})
+
+        if drf() != fast():
+            self.stdout.write(self.style.ERROR(f"{name}: outputs differ"))
+            return
+
+        timings = {}
+        for label, render in (('drf', drf), ('fast', fast)):
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                render()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[label] = statistics.median(samples)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{name}: {len(list(queryset))} rows, drf={timings['drf']:.1f}ms fast={timings['fast']:.1f}ms "
+            f"({timings['drf'] / timings['fast']:.1f}x), identical output"
+        ))
@@ -0,0 +1,109 @@
+import heapq
+import time
+from array import array
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from apps.books.models import BookRecommendation, Loan, RecommendationBuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Store the top co-borrowed books of every book for the similar-books endpoint; '
+        'after the first run only books touched by new loans are recomputed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Neighbors stored per book')
+        parser.add_argument('--shard-size', type=int, default=2000, help='Books whose neighbors are counted per pass')
+        parser.add_argument(
+            '--max-basket', type=int, default=1000,
+            help='Skip patrons who borrowed more distinct books than this; they relate everything to everything',
+        )
+        parser.add_argument('--full', action='store_true', help='Recompute every book, not just those with new loans')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        last_build = RecommendationBuild.objects.first()
+        # Loans after this id are left to the next run
+        last_loan_id = Loan.objects.aggregate(last=Max('id'))['last'] or 0
+        full = options['full'] or last_build is None
+
+        if full:
+            sources = Loan.objects.all()
+        elif last_loan_id > last_build.last_loan_id:
+            # A new loan pairs its book with every book of its borrower, so
+            # all of those books' neighbor lists may change
+            borrowers = Loan.objects.filter(id__gt=last_build.last_loan_id, id__lte=last_loan_id).values('user_id')
+            sources = Loan.objects.filter(user_id__in=borrowers)
+        else:
+            self.stdout.write("No new loans since the last build")
+            return
+        sources = array('q', sources.values_list('book_id', flat=True).order_by('book_id').distinct().iterator())
+
+        stored = 0
+        for start in range(0, len(sources), options['shard_size']):
+            shard = sources[start:start + options['shard_size']]
+            neighbors = self._count_shard(shard, options['max_basket'])
+            rows = [
+                BookRecommendation(book_id=book_id, similar_id=similar_id, rank=rank, score=score)
+                for book_id, counts in neighbors.items()
+                for rank, (similar_id, score) in enumerate(
+                    heapq.nsmallest(options['top'], counts.items(), key=lambda item: (-item[1], item[0])), start=1
+                )
+            ]
+            # Each book's list is swapped in one transaction, so readers
+            # see either the old neighbors or the new ones
+            with transaction.atomic():
+                BookRecommendation.objects.filter(book_id__in=shard.tolist()).delete()
+                BookRecommendation.objects.bulk_create(rows, batch_size=5000)
+            stored += len(rows)
+
+        if full:
+            BookRecommendation.objects.exclude(book_id__in=Loan.objects.values('book_id')).delete()
+        RecommendationBuild.objects.create(last_loan_id=last_loan_id, books=len(sources), full=full)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if full else 'Incremental'} build: {stored} neighbors for {len(sources)} books "
+            f"in {time.monotonic() - started:.2f}s"
+        ))
+
+    def _count_shard(self, shard: array, max_basket: int) -> dict:
+        """
+        Co-borrow counts of the books in `shard` against every other book:
+        {book id: {other book id: patrons who borrowed both}}.
+
+        Only the shard's rows of the co-occurrence matrix are held, and the
+        (user, book) pairs are streamed grouped by user, so memory stays
+        bounded by the shard rather than by the loan table.
+        """
+        neighbors = {book_id: {} for book_id in shard}
+        # Shard ids are sorted, so the range covers them all; in incremental
+        # runs it may pull in extra patrons, whose other books are ignored
+        borrowers = Loan.objects.filter(book_id__gte=shard[0], book_id__lte=shard[-1]).values('user_id')
+        pairs = (
+            Loan.objects.filter(user_id__in=borrowers).values_list('user_id', 'book_id')
+            .order_by('user_id', 'book_id').distinct()
+        )
+
+        def add(basket):
+            if len(basket) > max_basket:
+                return
+            for book_id in basket:
+                counts = neighbors.get(book_id)
+                if counts is None:
+                    continue
+                for other_id in basket:
+                    if other_id != book_id:
+                        counts[other_id] = counts.get(other_id, 0) + 1
+
+        current_user, basket = None, array('q')
+        for user_id, book_id in pairs.iterator(chunk_size=5000):
+            if user_id != current_user:
+                add(basket)
+                current_user, basket = user_id, array('q')
+            basket.append(book_id)
+        add(basket)
+        return neighbors
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.books.exports import CONTENT_TYPES, EXPORTS, export_queryset, parse_since, stream_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream a full or incremental dump of books or loans as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=tuple(EXPORTS), help='Table to export')
+        parser.add_argument('--format', choices=tuple(CONTENT_TYPES), default='ndjson', help='Output format')
+        parser.add_argument('--since', help='Only rows updated at or after this ISO 8601 datetime')
+        parser.add_argument('--output', default='-', help='Output file (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_since(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+
+        queryset, fields = export_queryset(options['name'], since)
+        chunks = stream_rows(queryset, fields, options['format'], options['chunk_size'])
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
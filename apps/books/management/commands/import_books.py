@@ -0,0 +1,182 @@
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from apps.books.models import Book
+from apps.books.serializers import BookImportSerializer
+
+
+IMPORT_FIELDS = ('title', 'author', 'isbn', 'page_count', 'description', 'total_copies')
+
+
+def read_records(path: str, fmt: str):
+    """
+    Yield (row_number, payload) pairs without loading the file into memory.
+
+    CSV rows are parsed here because quoted fields may span lines; JSONL lines
+    are passed through raw so workers can parse them in parallel.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for row_number, row in enumerate(csv.DictReader(f), start=1):
+                yield row_number, row
+        else:
+            row_number = 0
+            for line in f:
+                if line.strip():
+                    row_number += 1
+                    yield row_number, line
+
+
+def validate_batch(batch: list) -> list:
+    """
+    Parse and validate a batch of records with the BookSerializer rules.
+
+    Returns (row_number, validated_data, errors) triples. Runs in the worker
+    processes when a pool is used, so it must stay a module-level function.
+    """
+    results = []
+    for row_number, payload in batch:
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except ValueError as e:
+                results.append((row_number, None, {"json": [str(e)]}))
+                continue
+        if not isinstance(payload, dict):
+            results.append((row_number, None, {"row": ["Expected an object"]}))
+            continue
+
+        # Missing columns are left out so optional fields fall back to their defaults
+        data = {field: payload[field] for field in IMPORT_FIELDS if payload.get(field) not in (None, '')}
+        serializer = BookImportSerializer(data=data)
+        if serializer.is_valid():
+            results.append((row_number, dict(serializer.validated_data), None))
+        else:
+            results.append((row_number, None, json.loads(json.dumps(serializer.errors))))
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or JSONL catalog export into the books table in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file to import')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk INSERT and transaction')
+        parser.add_argument('--workers', type=int, default=0, help='Worker processes for parsing and validation (0 = inline)')
+        parser.add_argument('--rejects', help='File receiving rejected rows as JSONL (default: <path>.rejects.jsonl)')
+        parser.add_argument('--checkpoint', help='Progress file used to resume (default: <path>.checkpoint.json)')
+        parser.add_argument('--resume', action='store_true', help='Skip the rows committed by a previous run')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        batch_size = options['batch_size']
+        rejects_path = options['rejects'] or f"{path}.rejects.jsonl"
+        checkpoint_path = options['checkpoint'] or f"{path}.checkpoint.json"
+
+        progress = {"rows": 0, "imported": 0, "rejected": 0}
+        if options['resume'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                progress = json.load(f)
+            self.stdout.write(f"Resuming after row {progress['rows']}")
+
+        records = islice(read_records(path, fmt), progress['rows'], None)
+        batches = iter(lambda: list(islice(records, batch_size)), [])
+
+        started = time.monotonic()
+        rows_at_start = progress['rows']
+        with open(rejects_path, 'a' if options['resume'] else 'w', encoding='utf-8') as rejects:
+            for results in self._validated_batches(batches, options['workers']):
+                imported, rejected = self._insert_batch(results, rejects)
+                rejects.flush()
+
+                progress['rows'] = results[-1][0]
+                progress['imported'] += imported
+                progress['rejected'] += rejected
+                self._save_checkpoint(checkpoint_path, progress)
+
+                elapsed = time.monotonic() - started
+                rate = (progress['rows'] - rows_at_start) / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"{progress['rows']} rows read, {progress['imported']} imported, "
+                    f"{progress['rejected']} rejected ({rate:,.0f} rows/sec)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {progress['imported']} imported, {progress['rejected']} rejected in "
+            f"{time.monotonic() - started:.1f}s"
+        ))
+
+    def _validated_batches(self, batches, workers: int):
+        """
+        Yield validated batches in input order, keeping at most two batches
+        per worker in flight so memory stays bounded.
+        """
+        if workers <= 0:
+            for batch in batches:
+                yield validate_batch(batch)
+            return
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            pending = deque()
+            for batch in batches:
+                pending.append(executor.submit(validate_batch, batch))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _insert_batch(self, results: list, rejects) -> tuple:
+        """
+        Insert the valid rows of a batch in one transaction and write the
+        rest to the reject file. Returns (imported, rejected) counts.
+
+        Rejects are written only once the batch commits, so a batch that is
+        retried with --resume does not list its rejects twice.
+        """
+        valid, rejected_rows = [], []
+        for row_number, data, errors in results:
+            if errors:
+                rejected_rows.append({"row": row_number, "errors": errors})
+            else:
+                valid.append((row_number, data))
+
+        with transaction.atomic():
+            # One query checks the whole batch against the unique ISBN index
+            existing = set(Book.objects.filter(isbn__in=[data['isbn'] for _, data in valid]).values_list('isbn', flat=True))
+
+            books = []
+            for row_number, data in valid:
+                if data['isbn'] in existing:
+                    rejected_rows.append({"row": row_number, "errors": {"isbn": ["Book with this ISBN already exists"]}})
+                    continue
+                existing.add(data['isbn'])
+                books.append(Book(**data, available_copies=data.get('total_copies', 1)))
+
+            Book.objects.bulk_create(books)
+
+        for row in sorted(rejected_rows, key=lambda row: row['row']):
+            rejects.write(json.dumps(row) + "\n")
+        return len(books), len(rejected_rows)
+
+    def _save_checkpoint(self, checkpoint_path: str, progress: dict):
+        # Write-then-rename so a crash never leaves a torn checkpoint
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-18 04:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('author', models.CharField(max_length=200)),
+                ('isbn', models.CharField(max_length=13)),
+                ('page_count', models.IntegerField()),
+                ('is_available', models.BooleanField(default=True)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='books_book_created_7c9a2b_idx'), models.Index(fields=['is_available', 'title'], name='books_book_is_avai_ad0ab2_idx'), models.Index(fields=['isbn'], name='books_book_isbn_54becd_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Loan',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('borrowed_at', models.DateTimeField(auto_now_add=True)),
+                ('returned_at', models.DateTimeField(blank=True, null=True)),
+                ('fine_amount', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('borrowed', 'Borrowed'), ('returned', 'Returned'), ('lost', 'Lost'), ('damaged', 'Damaged')], default='borrowed', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='books.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-borrowed_at'],
+                'indexes': [models.Index(fields=['user', 'status'], name='books_loan_user_id_80a2a0_idx'), models.Index(fields=['book', 'status'], name='books_loan_book_id_f1cead_idx')],
+            },
+        ),
+    ]
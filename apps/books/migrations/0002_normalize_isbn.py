@@ -0,0 +1,69 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+from apps.books.exceptions import InvalidISBNError
+from apps.books.isbn import SEPARATORS_RE, normalize_isbn
+
+
+BATCH_SIZE = 2000
+
+
+def normalize_isbns(apps, schema_editor):
+    """
+    Rewrite every ISBN to its canonical ISBN-13 form.
+
+    Values that are not valid ISBNs only lose their separators, so the
+    unique constraint added next still applies to them.
+    """
+    Book = apps.get_model('books', 'Book')
+
+    last_id = 0
+    while True:
+        books = list(Book.objects.filter(id__gt=last_id).order_by('id').only('id', 'isbn')[:BATCH_SIZE])
+        if not books:
+            break
+        last_id = books[-1].id
+
+        changed = []
+        for book in books:
+            try:
+                isbn = normalize_isbn(book.isbn)
+            except InvalidISBNError:
+                isbn = SEPARATORS_RE.sub('', book.isbn)
+            if isbn != book.isbn:
+                book.isbn = isbn
+                changed.append(book)
+        Book.objects.bulk_update(changed, ['isbn'])
+
+
+def merge_duplicate_isbns(apps, schema_editor):
+    """
+    Fold books sharing an ISBN into the oldest row.
+
+    Loans move to the surviving row, which stays available if any of the
+    merged rows was on the shelf. 0005 counts the surviving row's copies
+    from its open loans.
+    """
+    Book = apps.get_model('books', 'Book')
+    Loan = apps.get_model('books', 'Loan')
+
+    duplicates = Book.objects.values('isbn').annotate(rows=Count('id'), keeper_id=Min('id')).filter(rows__gt=1)
+    for group in duplicates.iterator():
+        others = list(Book.objects.filter(isbn=group['isbn']).exclude(id=group['keeper_id']).values_list('id', flat=True))
+        any_available = Book.objects.filter(isbn=group['isbn'], is_available=True).exists()
+
+        Loan.objects.filter(book_id__in=others).update(book_id=group['keeper_id'])
+        Book.objects.filter(id__in=others).delete()
+        Book.objects.filter(id=group['keeper_id']).update(is_available=any_available)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_isbns, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicate_isbns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+BATCH_SIZE = 2000
+
+
+def seed_copy_counts(apps, schema_editor):
+    """
+    Count the copies of every book: one per open loan, plus one on the shelf
+    when is_available is on, and never fewer than one.
+
+    0002 moved the open loans of rows sharing an ISBN onto the surviving row,
+    so a book can have several copies out at once; each of them has to be
+    in the inventory for its return to fit. Books without open loans keep
+    the field defaults, one copy on the shelf.
+    """
+    Book = apps.get_model('books', 'Book')
+    Loan = apps.get_model('books', 'Loan')
+
+    open_loans = (
+        Loan.objects.filter(status='borrowed').values('book_id').annotate(out=Count('id'))
+        .values_list('book_id', 'out', 'book__is_available').order_by('book_id')
+    )
+    batch = []
+    for book_id, out, is_available in open_loans.iterator(chunk_size=BATCH_SIZE):
+        total = max(1, out + is_available)
+        batch.append(Book(id=book_id, total_copies=total, available_copies=max(0, total - out)))
+        if len(batch) >= BATCH_SIZE:
+            Book.objects.bulk_update(batch, ['total_copies', 'available_copies'])
+            batch = []
+    Book.objects.bulk_update(batch, ['total_copies', 'available_copies'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='total_copies',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='available_copies',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(seed_copy_counts, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='book',
+            name='books_book_is_avai_ad0ab2_idx',
+        ),
+        migrations.RemoveField(
+            model_name='book',
+            name='is_available',
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='is_available',
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Q(('available_copies__gt', 0)),
+                output_field=models.BooleanField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['is_available', 'title'], name='books_book_is_avai_ad0ab2_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.CheckConstraint(
+                condition=models.Q(('available_copies__lte', models.F('total_copies'))),
+                name='book_available_copies_lte_total',
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import apps.books.models
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+BATCH_SIZE = 2000
+
+
+def backfill_due_dates(apps, schema_editor):
+    """
+    Give existing loans the due date they would have had when borrowed, and
+    clear blank fines so the column can become numeric.
+    """
+    Loan = apps.get_model('books', 'Loan')
+    loan_period = timedelta(days=settings.CIRCULATION['LOAN_PERIOD_DAYS'])
+
+    last_id = 0
+    while True:
+        loans = list(Loan.objects.filter(id__gt=last_id).order_by('id').only('id', 'borrowed_at')[:BATCH_SIZE])
+        if not loans:
+            break
+        last_id = loans[-1].id
+
+        for loan in loans:
+            loan.due_date = timezone.localdate(loan.borrowed_at) + loan_period
+        Loan.objects.bulk_update(loans, ['due_date'])
+
+    Loan.objects.filter(fine_amount='').update(fine_amount=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_book_copies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loan',
+            name='due_date',
+            field=models.DateField(default=apps.books.models.default_due_date),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['status', 'due_date'], name='books_loan_status_1d6294_idx'),
+        ),
+        migrations.RunPython(backfill_due_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 04:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_loan_fine_amount_decimal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='loan',
+            options={'ordering': ['-borrowed_at', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='loan',
+            name='books_loan_user_id_80a2a0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['user', 'status', '-borrowed_at'], name='books_loan_user_id_474cad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['user', '-borrowed_at'], name='books_loan_user_id_04fb9b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['-borrowed_at', '-id'], name='books_loan_borrowe_94e103_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-18 05:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.books.management.commands.rebuild_stats import rebuild_buckets
+
+
+def backfill_buckets(apps, schema_editor):
+    """
+    Count the loans made before the counters existed, so returns of those
+    loans do not drive currently_borrowed below zero.
+    """
+    rebuild_buckets(apps.get_model('books', 'Loan'), apps.get_model('books', 'CirculationStat'))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_holds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CirculationStat',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('event', models.CharField(choices=[('borrowed', 'Borrowed'), ('returned', 'Returned'), ('lost', 'Lost'), ('damaged', 'Damaged')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='books.book')),
+            ],
+            options={
+                'ordering': ['-day', 'book', 'event'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'book', 'event'), name='circulation_stat_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,7 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -11,35 +15,58 @@ class Book(models.Model):
     id  = models.BigAutoField(primary_key=True)
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=200)
-    isbn = models.CharField(max_length=13)
+    isbn = models.CharField(max_length=13, unique=True)
     page_count = models.IntegerField()
-    is_available = models.BooleanField(default=True)
+    total_copies = models.PositiveIntegerField(default=1)
+    available_copies = models.PositiveIntegerField(default=1)
+    # Derived by the database so it can never disagree with the counters
+    is_available = models.GeneratedField(
+        expression=models.Q(available_copies__gt=0),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
     description = models.TextField()
+    # Hold queue counters: tickets handed out and tickets served, so waiting
+    # holds are numbered hold_head + 1 ... hold_tail
+    hold_head = models.PositiveIntegerField(default=0)
+    hold_tail = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-created_at', 'is_available']
+        ordering = ['-created_at', '-id']
         indexes = [
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['is_available', 'title']),
-            models.Index(fields=['isbn'])
+            models.Index(fields=['updated_at'])
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(available_copies__lte=models.F('total_copies')),
+                name='book_available_copies_lte_total',
+            ),
         ]
 
     def __str__(self):
         return f"{self.title} by {self.author}"
 
-    @property
-    def borrow(self, user):
-        """
-        Borrow a book for a user.
-        """
-        if not self.is_available:
-            raise ValueError("Book is not available")
-        
-        self.is_available = False
-        self.borrowed_by = user
-        self.borrowed_at = timezone.now()
-        self.save()
+
+def default_due_date():
+    """
+    Due date for a loan starting today.
+    """
+    return timezone.localdate() + timedelta(days=settings.CIRCULATION['LOAN_PERIOD_DAYS'])
+
+
+def overdue_fine(days_overdue: int) -> Decimal:
+    """
+    Fine for a loan that is `days_overdue` days late, capped at MAX_OVERDUE_FINE.
+    """
+    if days_overdue <= 0:
+        return Decimal("0.00")
+    fine = settings.CIRCULATION['FINE_PER_DAY'] * days_overdue
+    cap = settings.CIRCULATION['MAX_OVERDUE_FINE']
+    return min(fine, cap) if cap else fine
 
 
 class Loan(models.Model):
@@ -59,32 +86,164 @@ class Loan(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     borrowed_at = models.DateTimeField(auto_now_add=True)
     returned_at = models.DateTimeField(null=True, blank=True)
-    fine_amount = models.CharField(max_length=100, null=True, blank=True)
+    due_date = models.DateField(default=default_due_date)
+    fine_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     status = models.CharField(max_length=100, choices=LOAN_STATUS_CHOICES, default='borrowed')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['-borrowed_at']
+        ordering = ['-borrowed_at', '-id']
         indexes = [
-            models.Index(fields=['user', 'status']),
-            models.Index(fields=['book', 'status'])
+            models.Index(fields=['user', 'status', '-borrowed_at']),
+            models.Index(fields=['user', '-borrowed_at']),
+            models.Index(fields=['-borrowed_at', '-id']),
+            models.Index(fields=['book', 'status']),
+            models.Index(fields=['status', 'due_date']),
+            models.Index(fields=['updated_at'])
         ]
 
-    def calculate_fine(self):
+    def calculate_fine(self, as_of=None) -> Decimal:
         """
         Calculate the fine amount for the loan.
+
+        Open loans accrue the overdue fine up to `as_of` (default today);
+        returned loans are charged for the days they came back late.
         """
         if self.status == 'borrowed':
-            return 0
+            as_of = as_of or timezone.localdate()
+            return overdue_fine((as_of - self.due_date).days)
         elif self.status == 'returned':
-            return 0
+            returned_on = timezone.localdate(self.returned_at) if self.returned_at else timezone.localdate()
+            return overdue_fine((returned_on - self.due_date).days)
         elif self.status == 'lost':
-            return 100
+            return settings.CIRCULATION['LOST_FINE']
         elif self.status == 'damaged':
-            return 50
+            return settings.CIRCULATION['DAMAGED_FINE']
         else:
-            return 0
+            return Decimal("0.00")
 
     def __str__(self):
         return f"{self.book.title} borrowed by {self.user.username}"
+
+
+class Hold(models.Model):
+    """
+    Model for a hold: a patron's place in the queue for a book.
+    """
+
+    HOLD_STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('fulfilled', 'Fulfilled'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Place in the book's queue; waiting holds stay numbered without gaps
+    ticket = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=HOLD_STATUS_CHOICES, default='waiting')
+    # The loan a fulfilled hold turned into
+    loan = models.OneToOneField(Loan, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # The next hold of a book is the first entry of this index
+            models.Index(fields=['book', 'ticket'], condition=models.Q(status='waiting'), name='hold_queue_idx'),
+            models.Index(fields=['user', 'status', '-created_at'], name='hold_user_status_idx'),
+            models.Index(fields=['-created_at', '-id'], name='hold_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['book', 'user'], condition=models.Q(status='waiting'), name='hold_one_waiting_per_patron',
+            ),
+        ]
+
+    @property
+    def position(self):
+        """
+        1-based place in the queue while waiting, from the book's counters.
+        """
+        if self.status != 'waiting':
+            return None
+        return self.ticket - self.book.hold_head
+
+    def __str__(self):
+        return f"{self.book.title} held for {self.user.username}"
+
+
+class CirculationStat(models.Model):
+    """
+    Model for a daily circulation counter: how often one book was borrowed,
+    returned, lost or damaged on one day.
+    """
+
+    EVENT_CHOICES = [
+        ('borrowed', 'Borrowed'),
+        ('returned', 'Returned'),
+        ('lost', 'Lost'),
+        ('damaged', 'Damaged'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    event = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day', 'book', 'event']
+        constraints = [
+            # The upsert target; also serves date-range reads
+            models.UniqueConstraint(fields=['day', 'book', 'event'], name='circulation_stat_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.event} x{self.count} of book {self.book_id}"
+
+
+class BookRecommendation(models.Model):
+    """
+    Model for one precomputed neighbor of a book: another book its
+    borrowers also borrowed, ranked by how many of them did.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommendations')
+    similar = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    # Patrons who borrowed both books
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['book', 'rank']
+        constraints = [
+            # Serves the similar-books lookup: one index range per book
+            models.UniqueConstraint(fields=['book', 'rank'], name='book_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.similar_id} for {self.book_id} (#{self.rank})"
+
+
+class RecommendationBuild(models.Model):
+    """
+    Model for a build_recommendations run; the last one's loan id is where
+    the next incremental run picks up.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    last_loan_id = models.BigIntegerField()
+    books = models.PositiveIntegerField()
+    full = models.BooleanField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"{'Full' if self.full else 'Incremental'} build through loan {self.last_loan_id}"
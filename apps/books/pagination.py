@@ -0,0 +1,133 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class AsyncCursorPagination(CursorPagination):
+    """
+    CursorPagination that can also fetch its page with the async ORM.
+
+    paginate_queryset() is DRF's implementation split in two: building the
+    page query, and turning its rows into the page and cursor positions.
+    apaginate_queryset() reads the rows with aiterator() in between.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._build_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._build_page([obj async for obj in queryset.aiterator()])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.offset, self.reverse, self.current_position = 0, False, None
+        else:
+            self.offset, self.reverse, self.current_position = self.cursor
+
+        # Cursor pagination always enforces an ordering
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # If we have a cursor with a fixed position then filter by that
+        if self.current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+
+            # Test for: (cursor reversed) XOR (queryset reversed)
+            if self.cursor.reverse != is_reversed:
+                kwargs = {order_attr + '__lt': self.current_position}
+            else:
+                kwargs = {order_attr + '__gt': self.current_position}
+
+            queryset = queryset.filter(**kwargs)
+
+        # One extra row tells whether a following page exists
+        return queryset[self.offset:self.offset + self.page_size + 1]
+
+    def _build_page(self, results: list):
+        self.page = list(results[:self.page_size])
+
+        # Determine the position of the final item following the page
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if self.reverse:
+            # The query ran in reverse, so restore the requested order
+            self.page = list(reversed(self.page))
+
+            self.has_next = (self.current_position is not None) or (self.offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = self.current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (self.current_position is not None) or (self.offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = self.current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class BookCursorPagination(AsyncCursorPagination):
+    """
+    Keyset pagination for the book catalog.
+
+    The cursor encodes the position in the (-created_at, -id) ordering, so
+    every page is an indexed range scan no matter how deep the client goes.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class BookSearchPagination(PageNumberPagination):
+    """
+    Page-number pagination for ranked search results.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class LoanCursorPagination(AsyncCursorPagination):
+    """
+    Keyset pagination for loan history, newest first.
+    """
+    ordering = ('-borrowed_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class HoldCursorPagination(AsyncCursorPagination):
+    """
+    Keyset pagination for a patron's holds, newest first.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
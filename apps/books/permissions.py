@@ -19,4 +19,5 @@ class IsOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user and request.user.is_staff:
             return True
-        return obj.user == request.user
\ No newline at end of file
+        # Compare ids so stateless token users (no database row) match too
+        return str(obj.user_id) == str(request.user.id)
@@ -0,0 +1,257 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from apps.books.models import Book
+
+
+# Columns returned for every search hit (same projection as the list view)
+RESULT_FIELDS = (
+    'id', 'title', 'author', 'isbn', 'page_count', 'total_copies', 'available_copies', 'is_available', 'created_at'
+)
+
+# Words are matched as whole tokens, the last one as a prefix for type-ahead
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query: str) -> list:
+    """
+    Split a raw search string into lower-cased word tokens.
+    """
+    return TOKEN_RE.findall(query.lower())
+
+
+class SearchResults:
+    """
+    Lazy, sliceable result set.
+
+    Django's Paginator only needs count() and slicing, so the backend runs one
+    COUNT and one ranked LIMIT/OFFSET query per page instead of materialising
+    every hit.
+    """
+
+    def __init__(self, backend, tokens: list, using: str):
+        self.backend = backend
+        self.tokens = tokens
+        self.using = using
+        self._count = None
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = self.backend.count(self.tokens, self.using) if self.tokens else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        if not self.tokens or stop <= start:
+            return []
+        return self.backend.page(self.tokens, start, stop - start, self.using)
+
+
+class BaseSearchBackend:
+    """
+    Interface for catalog search backends.
+    """
+
+    def install(self, using: str = 'default'):
+        """
+        Create (or repair) the index structures. Must be idempotent.
+        """
+
+    def clear(self, using: str = 'default'):
+        """
+        Drop every indexed row, for when the books table has been flushed.
+        """
+
+    def count(self, tokens: list, using: str) -> int:
+        raise NotImplementedError
+
+    def page(self, tokens: list, offset: int, limit: int, using: str) -> list:
+        raise NotImplementedError
+
+    def search(self, query: str, using: str = None) -> SearchResults:
+        """
+        Search the catalog, best matches first, on the database the router
+        picks for book reads unless `using` is given.
+        """
+        return SearchResults(self, tokenize(query), using or router.db_for_read(Book))
+
+    def _fetch_in_order(self, book_ids: list, using: str) -> list:
+        books = Book.objects.using(using).only(*RESULT_FIELDS).in_bulk(book_ids)
+        return [books[book_id] for book_id in book_ids if book_id in books]
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """
+    Search backed by an external-content SQLite FTS5 table.
+
+    Triggers keep the index in sync with books_book on insert, update and
+    delete, including bulk_create() and queryset update()/delete().
+    """
+
+    table = 'books_book_fts'
+    # bm25() column weights for title, author, description
+    weights = (10.0, 5.0, 1.0)
+
+    def install(self, using='default'):
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+                [self.table, f'{self.table}_ai', f'{self.table}_ad', f'{self.table}_au'],
+            )
+            if len(cursor.fetchall()) == 4:
+                return
+
+            # Table rebuilds in later migrations drop the triggers, so
+            # recreate everything and reindex from the content table
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, author, description, content='books_book', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON books_book BEGIN "
+                f"INSERT INTO {self.table}(rowid, title, author, description) "
+                "VALUES (new.id, new.title, new.author, new.description); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON books_book BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, title, author, description) "
+                "VALUES ('delete', old.id, old.title, old.author, old.description); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF title, author, description "
+                f"ON books_book BEGIN "
+                f"INSERT INTO {self.table}({self.table}, rowid, title, author, description) "
+                "VALUES ('delete', old.id, old.title, old.author, old.description); "
+                f"INSERT INTO {self.table}(rowid, title, author, description) "
+                "VALUES (new.id, new.title, new.author, new.description); END"
+            )
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+    def clear(self, using='default'):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('delete-all')")
+
+    def _match(self, tokens: list) -> str:
+        # Quote every token so user input can never be parsed as FTS5 syntax
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def count(self, tokens, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {self.table} WHERE {self.table} MATCH %s", [self._match(tokens)]
+            )
+            return cursor.fetchone()[0]
+
+    def page(self, tokens, offset, limit, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s OFFSET %s",
+                [self._match(tokens), *self.weights, limit, offset],
+            )
+            book_ids = [row[0] for row in cursor.fetchall()]
+        return self._fetch_in_order(book_ids, using)
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search backed by a GIN index over a weighted tsvector expression.
+
+    The index is an expression index on books_book, so PostgreSQL keeps it in
+    sync with every write on its own.
+    """
+
+    index = 'books_book_search_idx'
+    document = (
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(author, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+    )
+
+    def install(self, using='default'):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.index} ON books_book USING GIN (({self.document}))")
+
+    def _tsquery(self, tokens: list) -> str:
+        return ' & '.join(tokens) + ':*'
+
+    def count(self, tokens, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM books_book WHERE ({self.document}) @@ to_tsquery('simple', %s)",
+                [self._tsquery(tokens)],
+            )
+            return cursor.fetchone()[0]
+
+    def page(self, tokens, offset, limit, using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT id FROM books_book, to_tsquery('simple', %s) query "
+                f"WHERE ({self.document}) @@ query "
+                f"ORDER BY ts_rank_cd({self.document}, query) DESC, id DESC LIMIT %s OFFSET %s",
+                [self._tsquery(tokens), limit, offset],
+            )
+            book_ids = [row[0] for row in cursor.fetchall()]
+        return self._fetch_in_order(book_ids, using)
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Portable fallback using case-insensitive substring matches.
+
+    Has no index support and scans the table; use it only for databases
+    without a dedicated backend.
+    """
+
+    def _queryset(self, tokens, using):
+        queryset = Book.objects.using(using)
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(author__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset
+
+    def count(self, tokens, using):
+        return self._queryset(tokens, using).count()
+
+    def page(self, tokens, offset, limit, using):
+        first = tokens[0]
+        rank = Case(
+            When(title__icontains=first, then=Value(3)),
+            When(author__icontains=first, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+        queryset = self._queryset(tokens, using).only(*RESULT_FIELDS).annotate(rank=rank)
+        return list(queryset.order_by('-rank', '-created_at', '-id')[offset:offset + limit])
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTS5SearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend(using: str = 'default') -> BaseSearchBackend:
+    """
+    Return the configured search backend, picking one by database vendor when
+    BOOK_SEARCH_BACKEND is not set. Replicas share the primary's vendor.
+    """
+    backend_path = getattr(settings, 'BOOK_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    return VENDOR_BACKENDS.get(connections[using].vendor, SimpleSearchBackend)()
@@ -1,48 +1,208 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 
-from apps.books.models import Book, Loan
+from apps.books.exceptions import InvalidISBNError
+from apps.books.isbn import normalize_isbn
+from apps.books.models import Book, Hold, Loan
+
+
+class ISBNField(serializers.CharField):
+    """
+    ISBN-10 or ISBN-13 input, canonicalized to ISBN-13 before validators run.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return normalize_isbn(super().to_internal_value(data))
+        except InvalidISBNError as e:
+            raise serializers.ValidationError(str(e))
 
 
 class BookSerializer(serializers.ModelSerializer):
     is_available = serializers.BooleanField(read_only=True)
+    isbn = ISBNField(
+        max_length=17,
+        validators=[UniqueValidator(queryset=Book.objects.all(), message="Book with this ISBN already exists")]
+    )
     
     class Meta:
         model = Book
-        fields = '__all__'
+        # Hold queue counters are internal to HoldService
+        exclude = ('hold_head', 'hold_tail')
         read_only_fields = ('id', 'created_at', 'updated_at', 'available_copies')
+        extra_kwargs = {
+            'total_copies': {'min_value': 1},
+        }
 
 
 class BookListSerializer(serializers.ModelSerializer):
-    """Lightweight serializer for list views"""
+    """Lightweight serializer for list views (no description)"""
     is_available = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Book
-        fields = ['id', 'title', 'author', 'isbn', 'genre', 'available_copies', 
-                  'total_copies', 'is_available']
+        fields = ['id', 'title', 'author', 'isbn', 'page_count', 'available_copies', 'total_copies',
+                  'is_available', 'created_at']
 
 
 class LoanSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField(read_only=True)
+    # Plain source lookups instead of str(user), so select_related() covers them
+    user = serializers.CharField(source='user.username', read_only=True)
     book_title = serializers.CharField(source='book.title', read_only=True)
     
     class Meta:
         model = Loan
         fields = '__all__'
-        read_only_fields = ('id', 'user', 'borrowed_at', 'status', 
+        read_only_fields = ('id', 'user', 'borrowed_at', 'due_date', 'status', 
                            'fine_amount', 'created_at', 'updated_at')
 
 
+class HoldSerializer(serializers.ModelSerializer):
+    user = serializers.CharField(source='user.username', read_only=True)
+    book_title = serializers.CharField(source='book.title', read_only=True)
+    # Computed from the ticket and the book's queue head, no counting
+    position = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Hold
+        fields = ('id', 'book', 'book_title', 'user', 'status', 'position', 'loan', 'created_at', 'updated_at')
+        read_only_fields = fields
+
+
 class BorrowBookSerializer(serializers.Serializer):
-    book_id = serializers.UUIDField()
-    
-    def validate_book_id(self, value):
-        try:
-            book = Book.objects.get(id=value)
-            if not book.is_available:
-                raise serializers.ValidationError("This book is not available")
-        except Book.DoesNotExist:
-            raise serializers.ValidationError("Book not found")
-        return value
+    # Availability is decided by the atomic claim in BookBorrowService, not here
+    book_id = serializers.IntegerField(min_value=1)
+
+
+class BatchBorrowSerializer(serializers.Serializer):
+    book_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=100)
+
+
+class BatchReturnSerializer(serializers.Serializer):
+    loan_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=100)
+
+
+class ISBNResolveSerializer(serializers.Serializer):
+    isbns = serializers.ListField(child=serializers.CharField(max_length=32), min_length=1, max_length=1000)
+
+
+class BookImportSerializer(BookSerializer):
+    """
+    BookSerializer rules without the per-row uniqueness query; bulk imports
+    check ISBN uniqueness for a whole batch at once.
+    """
+    isbn = ISBNField(max_length=17)
+
+
+class HoldFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Hold.HOLD_STATUS_CHOICES, required=False)
+
+
+class StatsFilterSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({"start": "start must not be after end."})
+        return attrs
+
+
+class LoanHistoryFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Loan.LOAN_STATUS_CHOICES, required=False)
+    borrowed_after = serializers.DateTimeField(required=False)
+    borrowed_before = serializers.DateTimeField(required=False)
+    user_id = serializers.IntegerField(min_value=1, required=False)
+
+
+class ValuesSerializer:
+    """
+    Render .values() rows exactly as `serializer_class(rows, many=True)`
+    would render model instances, for read-heavy list views.
+
+    The field mapping is compiled once: fields whose to_representation() is
+    a no-op for what the database returns copy the value, the rest call the
+    bound field. Only model columns, lookups through relations and primary
+    key relations can be read from rows.
+    """
+
+    # str, int and bool columns come back from the database as-is
+    PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = None
+
+    @property
+    def compiled(self) -> tuple:
+        """
+        (name, values() key, field or None to copy the value) per field.
+        """
+        if self._compiled is None:
+            compiled = []
+            for name, field in self.serializer_class().fields.items():
+                if field.write_only:
+                    continue
+                if field.source == '*' or isinstance(field, (
+                    serializers.BaseSerializer, serializers.SerializerMethodField, serializers.ManyRelatedField,
+                )):
+                    raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{name} cannot be read from .values()")
+                source = '__'.join(field.source_attrs)
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                    field = None
+                elif isinstance(field, serializers.RelatedField):
+                    raise ImproperlyConfigured(f"{self.serializer_class.__name__}.{name} cannot be read from .values()")
+                elif type(field) in self.PASSTHROUGH_FIELDS:
+                    field = None
+                compiled.append((name, source, field))
+            self._compiled = tuple(compiled)
+        return self._compiled
+
+    def values(self, queryset):
+        """
+        Narrow `queryset` to the columns the serializer reads.
+        """
+        return queryset.values(*(source for _, source, _ in self.compiled))
+
+    def serialize(self, rows) -> list:
+        # The active timezone is looked up once per page rather than per value
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = tuple(
+            (name, source, None if field is None else self._converter(field, current_timezone))
+            for name, source, field in self.compiled
+        )
+        return [
+            {
+                name: value if convert is None or value is None else convert(value)
+                for name, source, convert in converters
+                for value in (row[source],)
+            }
+            for row in rows
+        ]
+
+    def _converter(self, field, current_timezone):
+        """
+        The field's to_representation, inlined for ISO 8601 datetimes.
+        """
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if (
+            not isinstance(field, serializers.DateTimeField) or current_timezone is None
+            or hasattr(field, 'timezone') or output_format is None or output_format.lower() != ISO_8601
+        ):
+            return field.to_representation
+
+        def convert(value):
+            try:
+                value = value.astimezone(current_timezone).isoformat()
+            except OverflowError:
+                # Let the field raise its own validation error
+                return field.to_representation(value)
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
@@ -1,11 +1,25 @@
 import logging
 import traceback
+from collections import Counter, defaultdict
 
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Max, Sum, Value, When
 from django.utils import timezone
 from django.contrib.auth.models import User
 
-from apps.books.models import Book, Loan
-from apps.books.serializers import LoanSerializer, BookSerializer
+from apps.books.exceptions import (
+    BatchConflictError,
+    BookAvailableError,
+    BookNotAvailableError,
+    BookNotFoundError,
+    HoldExistsError,
+    HoldNotWaitingError,
+    InvalidISBNError,
+    LoanNotBorrowedError,
+)
+from apps.books.isbn import normalize_isbn
+from apps.books.models import Book, BookRecommendation, CirculationStat, Hold, Loan
+from apps.books.serializers import LoanSerializer
 
 
 # Configure logging
@@ -23,17 +37,62 @@ class BookService:
         """
         return Book.objects.all()
 
+    def get_book_list(self):
+        """
+        Get the catalog projection used by list views.
+        """
+        return Book.objects.only(
+            'id', 'title', 'author', 'isbn', 'page_count', 'total_copies', 'available_copies', 'is_available', 'created_at'
+        )
+
+    def get_catalog_version(self) -> tuple:
+        """
+        (last updated_at, number of books): changes whenever a book is
+        added, edited, borrowed, returned or deleted. Max() reads the end of
+        the updated_at index.
+        """
+        version = Book.objects.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+        return version['last_modified'], version['count']
+
     def get_book_by_id(self, book_id: int) -> Book:
         """
         Get a book by id.
         """
         return Book.objects.get(id=book_id)
 
-    def create_book(self, title: str, author: str, isbn: str, page_count: int, description: str) -> Book:
+    def create_book(self, title: str, author: str, isbn: str, page_count: int, description: str, total_copies: int = 1) -> Book:
         """
         Create a book.
         """
-        return Book.objects.create(title=title, author=author, isbn=isbn, page_count=page_count, description=description)
+        return Book.objects.create(
+            title=title, author=author, isbn=normalize_isbn(isbn), page_count=page_count, description=description,
+            total_copies=total_copies, available_copies=total_copies
+        )
+
+    def get_book_by_isbn(self, isbn: str) -> Book:
+        """
+        Get a book by any ISBN-10 or ISBN-13 spelling.
+        """
+        return Book.objects.get(isbn=normalize_isbn(isbn))
+
+    def resolve_isbns(self, isbns: list) -> list:
+        """
+        Map scanned ISBNs to books with a single indexed IN query.
+        """
+        normalized = {}
+        for isbn in isbns:
+            try:
+                normalized[isbn] = normalize_isbn(isbn)
+            except InvalidISBNError:
+                normalized[isbn] = None
+
+        matches = self.get_book_list().filter(isbn__in={value for value in normalized.values() if value})
+        books = {book.isbn: book for book in matches}
+
+        return [
+            {"isbn": isbn, "normalized_isbn": normalized[isbn], "book": books.get(normalized[isbn])}
+            for isbn in isbns
+        ]
 
     def check_book_availability(self, book_id: int) -> bool:
         """
@@ -41,21 +100,229 @@ class BookService:
         """
         return Book.objects.get(id=book_id).is_available
 
-    def update_book_availability(self, book: Book, is_available: bool) -> dict:
+    def claim_copies(self, book_ids: list) -> int:
         """
-        Update a book's availability.
+        Take one copy of each book off the shelf.
+
+        A single UPDATE guarded by available_copies > 0; returns how many of
+        the books actually had a copy to give.
+        """
+        return Book.objects.filter(id__in=book_ids, available_copies__gt=0).update(
+            available_copies=F('available_copies') - 1, updated_at=timezone.now()
+        )
+
+    def release_copies(self, copies: Counter) -> int:
+        """
+        Put copies back on the shelf, `copies` mapping book id to count.
+        """
+        return Book.objects.filter(id__in=copies).update(
+            available_copies=self._counter_delta('available_copies', copies), updated_at=timezone.now()
+        )
+
+    def retire_copies(self, copies: Counter) -> int:
+        """
+        Remove lost or damaged copies from the inventory, `copies` mapping
+        book id to count.
+        """
+        return Book.objects.filter(id__in=copies).update(
+            total_copies=self._counter_delta('total_copies', copies, sign=-1), updated_at=timezone.now()
+        )
+
+    def _counter_delta(self, field: str, copies: Counter, sign: int = 1):
+        # Database-side arithmetic, so concurrent updates never overwrite each other
+        if all(count == 1 for count in copies.values()):
+            return F(field) + sign
+        return Case(
+            *[When(id=book_id, then=F(field) + sign * count) for book_id, count in copies.items()],
+            default=F(field),
+            output_field=IntegerField(),
+        )
+
+
+class StatsService:
+    """
+    Service for circulation statistics.
+
+    Borrow and return transactions add to daily (day, book, event) counters,
+    so dashboard reads aggregate buckets instead of scanning loans.
+    """
+
+    def record(self, event: str, copies: Counter, day=None):
+        """
+        Add `copies` (book id to count) to today's `event` buckets with one
+        upsert, inside the caller's transaction.
+        """
+        copies = +copies
+        if not copies:
+            return
+        day = day or timezone.localdate()
+        connection = connections[router.db_for_write(CirculationStat)]
+        table = connection.ops.quote_name(CirculationStat._meta.db_table)
+        # INSERT ... ON CONFLICT DO UPDATE (PostgreSQL, SQLite 3.24+) adds
+        # to a bucket race-free, however many books the batch touched
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (day, book_id, event, count) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(copies))} "
+                f"ON CONFLICT (day, book_id, event) DO UPDATE SET count = {table}.count + excluded.count",
+                [value for book_id, count in copies.items() for value in (day, book_id, event, count)],
+            )
+
+    def get_stats(self, start, end, top: int = 10) -> dict:
+        """
+        Dashboard figures for the days from `start` to `end` inclusive, plus
+        all-time totals; every query aggregates buckets only.
+        """
+        in_range = CirculationStat.objects.filter(day__gte=start, day__lte=end)
+
+        per_day = {}
+        for row in in_range.values('day', 'event').annotate(total=Sum('count')).order_by('day'):
+            per_day.setdefault(row['day'], dict.fromkeys(('borrowed', 'returned', 'lost', 'damaged'), 0))
+            per_day[row['day']][row['event']] = row['total']
+
+        totals = dict.fromkeys(('borrowed', 'returned', 'lost', 'damaged'), 0)
+        totals.update(
+            CirculationStat.objects.values_list('event').annotate(total=Sum('count')).order_by()
+        )
+
+        popular = (
+            in_range.filter(event='borrowed').values('book_id', 'book__title')
+            .annotate(loans=Sum('count')).order_by('-loans', 'book_id')[:top]
+        )
+
+        return {
+            "from": start,
+            "to": end,
+            "loans_per_day": [{"day": day, **counts} for day, counts in per_day.items()],
+            "popular_titles": [
+                {"book_id": row['book_id'], "title": row['book__title'], "loans": row['loans']} for row in popular
+            ],
+            "currently_borrowed": totals['borrowed'] - totals['returned'] - totals['lost'] - totals['damaged'],
+            "lost_total": totals['lost'],
+            "damaged_total": totals['damaged'],
+        }
+
+
+class RecommendationService:
+    """
+    Service for "patrons also borrowed" recommendations, precomputed by
+    the build_recommendations command.
+    """
+
+    def get_similar(self, book_id: int) -> list:
+        """
+        A book's stored neighbors, best first, read with one index range
+        scan; the book itself is only looked up when it has none.
+        """
+        rows = list(
+            BookRecommendation.objects.filter(book_id=book_id).order_by('rank')
+            .values('similar_id', 'similar__title', 'similar__author', 'similar__isbn', 'similar__is_available', 'score')
+        )
+        if not rows and not Book.objects.filter(id=book_id).exists():
+            raise BookNotFoundError("Book not found")
+
+        return [
+            {
+                "id": row['similar_id'],
+                "title": row['similar__title'],
+                "author": row['similar__author'],
+                "isbn": row['similar__isbn'],
+                "is_available": row['similar__is_available'],
+                "borrowed_together": row['score'],
+            }
+            for row in rows
+        ]
+
+
+class HoldService:
+    """
+    Service for holds.
+
+    Each book numbers its waiting holds hold_head + 1 ... hold_tail, so the
+    next hold is one indexed lookup and a patron's position is their ticket
+    minus hold_head. Every change to a queue locks the book row first.
+    """
+
+    def get_holds(self, user_id: int = None, status: str = None):
+        """
+        Get holds with their book joined in, which also carries the queue head
+        that positions are computed from.
+        """
+        holds = Hold.objects.select_related('book', 'user').only(
+            'id', 'ticket', 'status', 'loan', 'created_at', 'updated_at',
+            'book__id', 'book__title', 'book__hold_head', 'user__id', 'user__username'
+        )
+        if user_id is not None:
+            holds = holds.filter(user_id=user_id)
+        if status:
+            holds = holds.filter(status=status)
+        return holds
+
+    def place_hold(self, book_id: int, user_id: int) -> Hold:
+        """
+        Join the end of a book's queue.
         """
         try:
-            # Update book availability
-            book.is_available = is_available
-            book.save()
-            
-            return BookSerializer(book).data
-        
-        except Exception as e:
-            logger.error(f"Internal server error: {e}")
-            logger.error(traceback.format_exc())
-            raise ValueError("Internal server error")
+            with transaction.atomic():
+                book = Book.objects.select_for_update().only('id', 'available_copies').filter(id=book_id).first()
+                if book is None:
+                    raise BookNotFoundError("Book not found")
+                if book.available_copies > 0:
+                    raise BookAvailableError("Book is available, borrow it instead")
+
+                # Take the next ticket; the UPDATE also holds the row where
+                # select_for_update() is a no-op (SQLite)
+                Book.objects.filter(id=book_id).update(hold_tail=F('hold_tail') + 1)
+                ticket = Book.objects.values_list('hold_tail', flat=True).get(id=book_id)
+                return Hold.objects.create(book_id=book_id, user_id=user_id, ticket=ticket)
+
+        except IntegrityError:
+            raise HoldExistsError("You are already in the queue for this book")
+
+    def cancel_hold(self, hold_id: int) -> Hold:
+        """
+        Leave a queue; everyone behind moves up one place.
+        """
+        with transaction.atomic():
+            hold = Hold.objects.only('id', 'book_id').get(id=hold_id)
+            # Book row first, like every queue change, then the hold as it is now
+            Book.objects.filter(id=hold.book_id).update(hold_tail=F('hold_tail') - 1)
+            hold = Hold.objects.select_for_update().get(id=hold_id)
+            if hold.status != 'waiting':
+                raise HoldNotWaitingError("Hold is not waiting")
+
+            hold.status = 'cancelled'
+            hold.save(update_fields=['status', 'updated_at'])
+            # Close the gap with one indexed range UPDATE over the holds behind
+            Hold.objects.filter(book_id=hold.book_id, status='waiting', ticket__gt=hold.ticket).update(
+                ticket=F('ticket') - 1
+            )
+        return hold
+
+    def hand_over(self, book_id: int, copies: int = 1) -> int:
+        """
+        Lend up to `copies` returned copies straight to the front of the
+        queue and return how many were handed over.
+
+        Runs inside the caller's transaction: one query when the queue is
+        empty, otherwise one indexed "next hold" lookup per copy.
+        """
+        book = Book.objects.select_for_update().only('id', 'hold_head', 'hold_tail').get(id=book_id)
+        handed = 0
+        while handed < min(copies, book.hold_tail - book.hold_head):
+            hold = (
+                Hold.objects.select_for_update().only('id', 'user_id')
+                .filter(book_id=book_id, status='waiting').order_by('ticket').first()
+            )
+            if hold is None:
+                break
+            loan = Loan.objects.create(book_id=book_id, user_id=hold.user_id, status='borrowed')
+            Hold.objects.filter(id=hold.id).update(status='fulfilled', loan=loan, updated_at=timezone.now())
+            handed += 1
+        if handed:
+            Book.objects.filter(id=book_id).update(hold_head=F('hold_head') + handed, updated_at=timezone.now())
+            StatsService().record('borrowed', Counter({book_id: handed}))
+        return handed
 
 
 class LoanService:
@@ -65,6 +332,8 @@ class LoanService:
 
     def __init__(self):
         self.book_service = BookService()
+        self.hold_service = HoldService()
+        self.stats_service = StatsService()
 
     def get_loan_by_id(self, loan_id: int) -> Loan:
         """
@@ -72,35 +341,65 @@ class LoanService:
         """
         return Loan.objects.get(id=loan_id)
 
-    def create_loan(self, book: Book, user: User) -> Loan:
+    def get_loan_history(self, user_id: int = None, status: str = None, borrowed_after=None, borrowed_before=None):
         """
-        Create a loan.
+        Get loans with their book title and username joined in, so a page of
+        any size costs a single query.
+        """
+        loans = Loan.objects.select_related('book', 'user').only(
+            'id', 'borrowed_at', 'due_date', 'returned_at', 'fine_amount', 'status', 'created_at', 'updated_at',
+            'book__id', 'book__title', 'user__id', 'user__username'
+        )
+        if user_id is not None:
+            loans = loans.filter(user_id=user_id)
+        if status:
+            loans = loans.filter(status=status)
+        if borrowed_after:
+            loans = loans.filter(borrowed_at__gte=borrowed_after)
+        if borrowed_before:
+            loans = loans.filter(borrowed_at__lt=borrowed_before)
+        return loans
+
+    def create_loan(self, book_id: int, user_id: int) -> Loan:
         """
-        return Loan.objects.create(book=book, user=user, status='borrowed')
+        Create a loan and count it in today's circulation stats.
+        """
+        with transaction.atomic():
+            loan = Loan.objects.create(book_id=book_id, user_id=user_id, status='borrowed')
+            self.stats_service.record('borrowed', Counter([book_id]))
+        return loan
         
     def update_loan_status(self, loan: Loan, status: str) -> Loan:
         """
-        Update a loan's status.
+        Close an open loan as returned, lost or damaged.
         """
         # Updating loan status
+        now = timezone.now()
         loan.status = status
+        loan.updated_at = now
         if status == 'returned':
-            loan.returned_at = timezone.now()
-            loan.fine_amount = loan.calculate_fine()
-        elif status == 'lost':
-            loan.status = 'lost'
-            loan.fine_amount = 100
-        elif status == 'damaged':
-            loan.status = 'damaged'
-            loan.fine_amount = 50 
-        else:
+            loan.returned_at = now
+        elif status not in ('lost', 'damaged'):
             raise ValueError("Invalid status")
-        
-        # Saving loan record
-        loan.save()
+        loan.fine_amount = loan.calculate_fine()
 
-        # Update book availability
-        self.book_service.update_book_availability(loan.book, True)
+        with transaction.atomic():
+            # Saving loan record, only if nobody closed it first
+            closed = Loan.objects.filter(id=loan.id, status='borrowed').update(
+                status=loan.status, returned_at=loan.returned_at, fine_amount=loan.fine_amount, updated_at=now
+            )
+            if not closed:
+                raise LoanNotBorrowedError("Loan is not borrowed")
+
+            self.stats_service.record(status, Counter([loan.book_id]))
+
+            # Returned copies go to the next hold or back on the shelf, lost
+            # and damaged ones leave the inventory
+            if status == 'returned':
+                if not self.hold_service.hand_over(loan.book_id):
+                    self.book_service.release_copies(Counter([loan.book_id]))
+            else:
+                self.book_service.retire_copies(Counter([loan.book_id]))
 
         return loan
 
@@ -113,31 +412,33 @@ class BookBorrowService:
     def __init__(self):
         self.book_service = BookService()
         self.loan_service = LoanService()
+        self.stats_service = StatsService()
 
     def borrow_book(self, book_id: int, user_id: int) -> dict:
         """
         Borrow a book for a user.
+
+        The availability check and the claim are a single conditional UPDATE,
+        so concurrent borrowers can never take more copies than exist.
         """
         try:
-            # Check if book is available or not
-            if not self.book_service.check_book_availability(book_id):
-                raise ValueError("Book is not available")
-
-            # Fetch book and user
-            book = self.book_service.get_book_by_id(book_id)
-            user = User.objects.get(id=user_id)
+            with transaction.atomic():
+                # Claim a copy only if one is still on the shelf
+                claimed = self.book_service.claim_copies([book_id])
 
-            if not book or not user:
-                raise ValueError("Book or user not found")
-            
-            # Create a loan record
-            loan = self.loan_service.create_loan(book, user)
+                if not claimed:
+                    if Book.objects.filter(id=book_id).exists():
+                        raise BookNotAvailableError("Book is already borrowed")
+                    raise BookNotFoundError("Book not found")
 
-            # Update book availability
-            self.book_service.update_book_availability(book, False)
+                # Create a loan record
+                loan = self.loan_service.create_loan(book_id, user_id)
 
             return LoanSerializer(loan).data
-        
+
+        except (BookNotAvailableError, BookNotFoundError):
+            raise
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -150,18 +451,132 @@ class BookBorrowService:
         try:
             # Check if loan exists
             loan = self.loan_service.get_loan_by_id(loan_id)
-            
-            if not loan:
-                raise ValueError("Loan not found")
-            
+
             if loan.status != 'borrowed':
-                raise ValueError("Loan is not borrowed")
+                raise LoanNotBorrowedError("Loan is not borrowed")
 
             # Update loan status
             loan = self.loan_service.update_loan_status(loan, 'returned')
             return LoanSerializer(loan).data
-        
+
+        except (Loan.DoesNotExist, LoanNotBorrowedError):
+            raise
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            raise ValueError("Internal server error")
+
+    def borrow_books(self, book_ids: list, user: User) -> list:
+        """
+        Borrow several books for a user in one transaction.
+
+        Runs a fixed number of queries however many ids are passed: one read,
+        one conditional UPDATE and one bulk INSERT. Returns a result per id.
+        """
+        try:
+            results = {}
+            unique_ids = list(dict.fromkeys(book_ids))
+
+            with transaction.atomic():
+                books = Book.objects.select_for_update().only('id', 'title', 'available_copies').in_bulk(unique_ids)
+
+                claimable = [book_id for book_id in unique_ids if book_id in books and books[book_id].available_copies > 0]
+                for book_id in unique_ids:
+                    if book_id not in books:
+                        results[book_id] = {"book_id": book_id, "success": False, "error": "Book not found"}
+                    elif book_id not in claimable:
+                        results[book_id] = {"book_id": book_id, "success": False, "error": "Book is already borrowed"}
+
+                if claimable:
+                    # Claim a copy of every available book with a single guarded UPDATE
+                    claimed = self.book_service.claim_copies(claimable)
+                    if claimed != len(claimable):
+                        raise BatchConflictError("Books were borrowed concurrently, please retry")
+
+                    loans = Loan.objects.bulk_create(
+                        [Loan(book=books[book_id], user=user, status='borrowed') for book_id in claimable]
+                    )
+                    self.stats_service.record('borrowed', Counter(claimable))
+                    for loan in loans:
+                        results[loan.book_id] = {"book_id": loan.book_id, "success": True, "loan": LoanSerializer(loan).data}
+
+            return [results[book_id] for book_id in unique_ids]
+
+        except BatchConflictError:
+            raise
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            raise ValueError("Internal server error")
+
+    def return_books(self, loan_ids: list) -> list:
+        """
+        Return several loans in one transaction.
+
+        Runs a fixed number of queries however many ids are passed, plus the
+        hand-overs to waiting holds: one locking read and one conditional
+        UPDATE each for loans and books.
+        """
+        try:
+            results = {}
+            unique_ids = list(dict.fromkeys(loan_ids))
+
+            with transaction.atomic():
+                loans = Loan.objects.select_for_update().select_related('book', 'user').in_bulk(unique_ids)
+
+                returnable = [loan_id for loan_id in unique_ids if loan_id in loans and loans[loan_id].status == 'borrowed']
+                for loan_id in unique_ids:
+                    if loan_id not in loans:
+                        results[loan_id] = {"loan_id": loan_id, "success": False, "error": "Loan not found"}
+                    elif loan_id not in returnable:
+                        results[loan_id] = {"loan_id": loan_id, "success": False, "error": "Loan is not borrowed"}
+
+                if returnable:
+                    now = timezone.now()
+                    for loan_id in returnable:
+                        loan = loans[loan_id]
+                        loan.status = 'returned'
+                        loan.returned_at = now
+                        loan.fine_amount = loan.calculate_fine()
+                        loan.updated_at = now
+
+                    # Close every loan with a single guarded UPDATE, one CASE arm per distinct fine
+                    fines = defaultdict(list)
+                    for loan_id in returnable:
+                        fines[loans[loan_id].fine_amount].append(loan_id)
+                    fine_amount = Case(
+                        *[When(id__in=ids, then=Value(fine)) for fine, ids in fines.items()],
+                        output_field=DecimalField(max_digits=10, decimal_places=2),
+                    )
+                    returned = Loan.objects.filter(id__in=returnable, status='borrowed').update(
+                        status='returned', returned_at=now, fine_amount=fine_amount, updated_at=now
+                    )
+                    if returned != len(returnable):
+                        raise BatchConflictError("Loans were returned concurrently, please retry")
+
+                    # Copies of books with a queue go to their next holds; the rest go
+                    # back on the shelf with a single UPDATE. The book rows stay locked
+                    # from this read on, so no hold can join a queue read as empty
+                    copies = Counter(loans[loan_id].book_id for loan_id in returnable)
+                    self.stats_service.record('returned', copies)
+                    books = Book.objects.select_for_update().filter(id__in=copies).only('id', 'hold_head', 'hold_tail')
+                    queued = [book.id for book in books.order_by('id') if book.hold_tail > book.hold_head]
+                    for book_id in queued:
+                        copies[book_id] -= self.loan_service.hold_service.hand_over(book_id, copies[book_id])
+                    copies = +copies
+                    if copies:
+                        self.book_service.release_copies(copies)
+                    for loan_id in returnable:
+                        results[loan_id] = {"loan_id": loan_id, "success": True, "loan": LoanSerializer(loans[loan_id]).data}
+
+            return [results[loan_id] for loan_id in unique_ids]
+
+        except BatchConflictError:
+            raise
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
-            raise ValueError("Internal server error")
\ No newline at end of file
+            raise ValueError("Internal server error")
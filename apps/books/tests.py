@@ -1,3 +1,1212 @@
-from django.test import TestCase
+import csv
+import importlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import traceback
+import warnings
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.urls import clear_url_caches, resolve
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from apps.books.exceptions import BookNotAvailableError, InvalidISBNError
+from apps.books.isbn import normalize_isbn
+from apps.books.models import Book, BookRecommendation, CirculationStat, Hold, Loan
+from apps.books.search import get_search_backend
+from apps.books.serializers import BookListSerializer, LoanSerializer, ValuesSerializer
+from apps.books.services import BookBorrowService, BookService, HoldService, RecommendationService, StatsService
+from apps.books.views import (
+    AsyncBookListView,
+    AsyncBookSearchView,
+    AsyncLoanDetailView,
+    AsyncLoanHistoryView,
+    AsyncStaffLoanHistoryView,
+)
+from library_mgmt.benchmarking import compare_to_baseline
+from library_mgmt import metrics
+from library_mgmt.log import JSONFormatter, RequestContextFilter, request_context_middleware
+from library_mgmt.probes import readiness
+from library_mgmt.renderers import FastJSONRenderer
+from library_mgmt.routers import pin_primary_middleware
+from library_mgmt.settings.database import database_from_env, replicas_from_env
+
+
+class ConcurrentBorrowTests(TransactionTestCase):
+    """
+    Concurrent borrowers racing for the same book.
+    """
+
+    borrowers = 8
+
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Dune", author="Frank Herbert", isbn="9780441013593", page_count=412, description="Arrakis"
+        )
+        self.users = [
+            User.objects.create_user(username=f"patron{i}", password="x") for i in range(self.borrowers)
+        ]
+
+    def race(self):
+        barrier = threading.Barrier(self.borrowers)
+        wins, conflicts, errors = [], [], []
+
+        def borrow(user):
+            try:
+                barrier.wait()
+                wins.append(BookBorrowService().borrow_book(self.book.id, user.id))
+            except BookNotAvailableError:
+                conflicts.append(user)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=borrow, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        return wins, conflicts
+
+    def test_only_one_of_many_simultaneous_borrowers_wins(self):
+        wins, conflicts = self.race()
+
+        self.assertEqual(len(wins), 1)
+        self.assertEqual(len(conflicts), self.borrowers - 1)
+        self.assertEqual(Loan.objects.filter(book=self.book).count(), 1)
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.is_available)
+
+    def test_simultaneous_borrowers_never_take_more_copies_than_exist(self):
+        Book.objects.filter(id=self.book.id).update(total_copies=3, available_copies=3)
+
+        wins, conflicts = self.race()
+
+        self.assertEqual(len(wins), 3)
+        self.assertEqual(len(conflicts), self.borrowers - 3)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertFalse(self.book.is_available)
+
+
+class BatchConflictTests(TestCase):
+    """
+    A batch that loses a row to a concurrent request between its read and
+    its guarded UPDATE changes nothing and answers 409.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patron", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.books = [
+            Book.objects.create(title=f"Book {i}", author="A", isbn=f"978044101359{i}", page_count=1,
+                                description="", total_copies=1, available_copies=1)
+            for i in range(2)
+        ]
+
+    def test_borrow_cart_is_all_or_nothing(self):
+        claim_copies = BookService.claim_copies
+
+        def claimed_concurrently(service, book_ids):
+            # Another patron takes the last copy of the second book first
+            Book.objects.filter(id=self.books[1].id).update(available_copies=0)
+            return claim_copies(service, book_ids)
+
+        with mock.patch.object(BookService, 'claim_copies', autospec=True, side_effect=claimed_concurrently):
+            response = self.client.post('/api/books/loan/batch/', {"book_ids": [book.id for book in self.books]}, format='json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Loan.objects.exists())
+        self.assertEqual(Book.objects.get(id=self.books[0].id).available_copies, 1)
+
+    def test_return_batch_is_all_or_nothing(self):
+        loans = BookBorrowService().borrow_books([book.id for book in self.books], self.user)
+        loan_ids = [result['loan']['id'] for result in loans]
+        calculate_fine = Loan.calculate_fine
+
+        def returned_concurrently(loan, *args, **kwargs):
+            # The second loan is closed by another request first
+            Loan.objects.filter(id=loan_ids[1]).update(status='returned')
+            return calculate_fine(loan, *args, **kwargs)
+
+        with mock.patch.object(Loan, 'calculate_fine', autospec=True, side_effect=returned_concurrently):
+            response = self.client.post('/api/books/return/batch/', {"loan_ids": loan_ids}, format='json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Loan.objects.get(id=loan_ids[0]).status, 'borrowed')
+        self.assertEqual(Book.objects.get(id=self.books[0].id).available_copies, 0)
+
+
+class NormalizeISBNTests(SimpleTestCase):
+    """
+    normalize_isbn() canonicalises ISBN-10 and ISBN-13 spellings to bare
+    ISBN-13 and rejects bad check digits.
+    """
+
+    def test_spellings_of_the_same_book_agree(self):
+        for value in ("9780441013593", "978-0-441-01359-3", " 978 0441 013593 ", "0441013597", "0-441-01359-7"):
+            self.assertEqual(normalize_isbn(value), "9780441013593")
+
+    def test_isbn10_with_x_check_digit(self):
+        self.assertEqual(normalize_isbn("0-8044-2957-x"), "9780804429573")
+
+    def test_invalid_values_are_rejected(self):
+        for value in ("9780441013594", "0441013598", "044101359X", "97804410135", "978044101359A", ""):
+            with self.assertRaises(InvalidISBNError, msg=value):
+                normalize_isbn(value)
+
+
+class DataMigrationTests(TransactionTestCase):
+    """
+    Data migrations carry existing rows over correctly.
+    """
+
+    def migrate_to(self, target=None):
+        """
+        Migrate books to `target`, or to the latest migration, and return
+        the historical apps at that state.
+        """
+        executor = MigrationExecutor(connection)
+        targets = [('books', target)] if target else executor.loader.graph.leaf_nodes()
+        executor.migrate(targets)
+        return MigrationExecutor(connection).loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate_to()
+
+    def test_isbns_are_canonicalised_and_duplicates_merged(self):
+        old_apps = self.migrate_to('0001_initial')
+        OldBook = old_apps.get_model('books', 'Book')
+        for isbn in ("978-0-441-01359-3", "0441013597", "0-8044-2957-X", "12 34-5"):
+            OldBook.objects.create(title="Book", author="A", isbn=isbn, page_count=1, description="")
+
+        self.migrate_to()
+
+        # Values that are not ISBNs only lose their separators
+        self.assertEqual(sorted(Book.objects.values_list('isbn', flat=True)), ["12345", "9780441013593", "9780804429573"])
+
+    def test_duplicates_on_loan_can_all_be_returned(self):
+        old_apps = self.migrate_to('0001_initial')
+        OldBook, OldLoan = old_apps.get_model('books', 'Book'), old_apps.get_model('books', 'Loan')
+        user = old_apps.get_model('auth', 'User').objects.create(username="patron")
+        for isbn in ("978-0-441-01359-3", "0441013597"):
+            book = OldBook.objects.create(title="Dune", author="Herbert", isbn=isbn, page_count=1, description="", is_available=False)
+            OldLoan.objects.create(book=book, user_id=user.id)
+
+        self.migrate_to()
+
+        book = Book.objects.get()
+        self.assertEqual((book.total_copies, book.available_copies), (2, 0))
+        service = BookBorrowService()
+        for loan_id in Loan.objects.values_list('id', flat=True):
+            service.return_book(loan_id)
+        book.refresh_from_db()
+        self.assertEqual(book.available_copies, 2)
+
+    def test_circulation_counters_count_existing_loans(self):
+        old_apps = self.migrate_to('0009_holds')
+        OldBook, OldLoan = old_apps.get_model('books', 'Book'), old_apps.get_model('books', 'Loan')
+        user = old_apps.get_model('auth', 'User').objects.create(username="patron")
+        book = OldBook.objects.create(title="Dune", author="Herbert", isbn="9780441013593", page_count=1, description="",
+                                      total_copies=2, available_copies=1)
+        OldLoan.objects.create(book=book, user_id=user.id, status='returned', returned_at=timezone.now())
+        loan = OldLoan.objects.create(book=book, user_id=user.id)
+
+        self.migrate_to()
+        BookBorrowService().return_book(loan.id)
+
+        today = timezone.localdate()
+        stats = StatsService().get_stats(today, today)
+        self.assertEqual(stats['currently_borrowed'], 0)
+        self.assertEqual(stats['loans_per_day'][0]['returned'], 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """
+    Which database each read goes to within a request.
+    """
+
+    def route(self, method, view):
+        request = RequestFactory().generic(method, '/')
+        routed = []
+        pin_primary_middleware(lambda request: view(routed) or HttpResponse())(request)
+        return routed
+
+    def test_catalog_reads_in_safe_requests_go_to_a_replica(self):
+        routed = self.route('GET', lambda routed: routed.append(Book.objects.all().db))
+        self.assertEqual(routed, ['replica_1'])
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        def view(routed):
+            routed.append(Loan.objects.all().db)
+            routed.append(Book.objects.select_for_update().db)
+            routed.append(Loan.objects.all().db)
+
+        self.assertEqual(self.route('GET', view), ['replica_1', 'default', 'default'])
+        # The pin ends with the request
+        self.assertEqual(self.route('GET', lambda routed: routed.append(Book.objects.all().db)), ['replica_1'])
+
+    def test_unsafe_requests_and_other_apps_read_the_primary(self):
+        self.assertEqual(self.route('POST', lambda routed: routed.append(Book.objects.all().db)), ['default'])
+        self.assertEqual(self.route('GET', lambda routed: routed.append(User.objects.all().db)), ['default'])
+
+
+class BaselineComparisonTests(SimpleTestCase):
+    """
+    What bench_api counts as a regression.
+    """
+
+    def results(self, p95_ms=10.0, queries=3, peak_memory_kib=100.0):
+        return {"endpoints": {"list": {
+            "p50_ms": 5.0, "p95_ms": p95_ms, "p99_ms": 20.0,
+            "queries_per_request": queries, "peak_memory_kib": peak_memory_kib,
+        }}}
+
+    def test_noise_within_tolerance_passes(self):
+        self.assertEqual(compare_to_baseline(self.results(p95_ms=12.0, peak_memory_kib=150.0), self.results(), 0.25), [])
+
+    def test_slower_requests_or_extra_queries_regress(self):
+        regressions = compare_to_baseline(self.results(p95_ms=13.0, queries=4), self.results(), 0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("p95_ms", regressions[0])
+        self.assertIn("queries_per_request", regressions[1])
+
+
+class FastRenderingTests(TestCase):
+    """
+    The .values() and orjson path renders the same bytes as DRF.
+    """
+
+    def setUp(self):
+        user = User.objects.create_user(username="patrón", password="x")
+        for i, title in enumerate(["Dune", "Café \u2028 \"quoted\" \\ line", "Ünïcödé 📚"]):
+            book = Book.objects.create(
+                title=title, author="Author", isbn=f"978044101359{i}", page_count=412, description="", total_copies=2
+            )
+            Loan.objects.create(book=book, user=user)
+        Loan.objects.filter(book__title="Dune").update(status='returned', returned_at=timezone.now(), fine_amount="1.5")
+
+    def assertSameBytes(self, serializer_class, queryset):
+        expected = JSONRenderer().render({"rows": serializer_class(queryset, many=True).data})
+        rows = ValuesSerializer(serializer_class)
+        self.assertEqual(FastJSONRenderer().render({"rows": rows.serialize(rows.values(queryset))}), expected)
+
+    def test_book_and_loan_pages_render_identically(self):
+        self.assertSameBytes(BookListSerializer, Book.objects.order_by('id'))
+        self.assertSameBytes(LoanSerializer, Loan.objects.order_by('id'))
+        with timezone.override('Asia/Kolkata'):
+            self.assertSameBytes(LoanSerializer, Loan.objects.order_by('id'))
+
+
+@override_settings(HEALTH_PROBES={'READINESS_TTL': 0, 'TIMEOUT': 5})
+class ProbeTests(TestCase):
+    """
+    /livez and /readyz answer without authentication.
+    """
+
+    def setUp(self):
+        readiness._response = None
+
+    def test_live_and_ready(self):
+        self.assertEqual(self.client.get('/livez').status_code, 200)
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['checks']['database:default'], "ok")
+
+    def test_unreachable_cache_is_not_ready(self):
+        broken = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:1'}
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}, 'shared': broken}):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(response.json()['data']['checks']['cache:shared'].startswith("error"))
+
+
+class RequestLoggingTests(SimpleTestCase):
+    """
+    Log records carry the request id and a failure's traceback is kept once.
+    """
+
+    def test_repeated_traceback_within_a_request_is_dropped(self):
+        records = []
+        log_filter = RequestContextFilter()
+
+        def log(message):
+            record = logging.LogRecord('apps.books', logging.ERROR, __file__, 1, message, None, None)
+            if log_filter.filter(record):
+                records.append(record)
+
+        def view(request):
+            try:
+                try:
+                    raise KeyError("missing")
+                except Exception:
+                    # Service layer
+                    log(traceback.format_exc())
+                    raise ValueError("Internal server error")
+            except Exception as e:
+                # View layer
+                log(f"Internal server error: {e}")
+                log(traceback.format_exc())
+            return HttpResponse()
+
+        request = RequestFactory().get('/', HTTP_X_REQUEST_ID='abc123')
+        response = request_context_middleware(view)(request)
+
+        self.assertEqual(response['X-Request-ID'], 'abc123')
+        self.assertEqual(len(records), 2)
+        self.assertIn("KeyError", records[0].getMessage())
+        self.assertEqual(json.loads(JSONFormatter().format(records[1]))['request_id'], 'abc123')
+
+
+@override_settings(CIRCULATION={**settings.CIRCULATION, 'FINE_PER_DAY': Decimal("0.50"), 'MAX_OVERDUE_FINE': Decimal("20.00")})
+class FineAssessmentTests(TestCase):
+    """
+    assess_fines charges what Loan.calculate_fine() would, up to the cap,
+    and a rerun changes nothing.
+    """
+
+    today = date(2026, 6, 30)
+
+    def setUp(self):
+        user = User.objects.create_user(username="patron", password="x")
+        book = Book.objects.create(title="Dune", author="Herbert", isbn="9780441013593", page_count=1, description="")
+        # 40 days late is exactly the cap at 0.50 a day
+        self.loans = {
+            days: Loan.objects.create(book=book, user=user, due_date=self.today - timedelta(days=days))
+            for days in (0, 1, 39, 40, 41, 400)
+        }
+
+    def assess(self) -> str:
+        out = StringIO()
+        call_command('assess_fines', '--date', self.today.isoformat(), stdout=out)
+        return out.getvalue()
+
+    def fines(self) -> dict:
+        return {days: Loan.objects.get(id=loan.id).fine_amount for days, loan in self.loans.items()}
+
+    def test_fines_stop_at_the_cap(self):
+        self.assess()
+
+        self.assertEqual(self.fines(), {
+            0: None, 1: Decimal("0.50"), 39: Decimal("19.50"), 40: Decimal("20.00"), 41: Decimal("20.00"), 400: Decimal("20.00"),
+        })
+        for days, loan in self.loans.items():
+            if days:
+                self.assertEqual(loan.calculate_fine(as_of=self.today), self.fines()[days])
+
+    def test_returned_loans_are_charged_for_the_days_late(self):
+        loan = self.loans[0]
+        loan.status = 'returned'
+        for days_late, fine in ((0, "0.00"), (3, "1.50"), (45, "20.00")):
+            returned_on = loan.due_date + timedelta(days=days_late)
+            loan.returned_at = timezone.make_aware(datetime(returned_on.year, returned_on.month, returned_on.day, 12))
+            self.assertEqual(loan.calculate_fine(), Decimal(fine))
+
+    def test_rerun_updates_nothing_until_fines_change(self):
+        self.assertIn(" 5 loans updated", self.assess())
+        self.assertIn(" 0 loans updated", self.assess())
+
+        self.today += timedelta(days=1)
+        self.assertIn(" 3 loans updated", self.assess())
+        self.assertEqual(self.fines()[39], Decimal("20.00"))
+
+
+class HoldQueueTests(TestCase):
+    """
+    Returned copies go to the front of the queue; positions close up.
+    """
+
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="Dune", author="Frank Herbert", isbn="9780441013593", page_count=412, description="Arrakis"
+        )
+        self.users = [User.objects.create_user(username=f"patron{i}", password="x") for i in range(4)]
+        self.loan = BookBorrowService().borrow_book(self.book.id, self.users[0].id)
+
+    def positions(self, holds):
+        return [HoldService().get_holds().get(id=hold.id).position for hold in holds]
+
+    def test_return_lends_to_the_next_hold(self):
+        holds = [HoldService().place_hold(self.book.id, user.id) for user in self.users[1:]]
+        HoldService().cancel_hold(holds[0].id)
+        self.assertEqual(self.positions(holds[1:]), [1, 2])
+
+        BookBorrowService().return_book(self.loan['id'])
+
+        fulfilled = Hold.objects.get(id=holds[1].id)
+        self.assertEqual(fulfilled.status, 'fulfilled')
+        self.assertEqual(fulfilled.loan.user, self.users[2])
+        self.assertEqual(self.positions(holds[2:]), [1])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+
+    def test_batch_return_lends_queued_copies_and_shelves_the_rest(self):
+        other = Book.objects.create(title="Emma", author="Austen", isbn="9780141439587", page_count=1, description="")
+        batch = BookBorrowService().borrow_books([other.id], self.users[0])
+        hold = HoldService().place_hold(self.book.id, self.users[1].id)
+
+        BookBorrowService().return_books([self.loan['id'], batch[0]['loan']['id']])
+
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, 'fulfilled')
+        self.assertEqual(hold.loan.user, self.users[1])
+        self.book.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.book.available_copies, self.book.hold_head), (0, 1))
+        self.assertEqual(other.available_copies, 1)
+
+
+class CirculationStatsTests(TestCase):
+    """
+    Borrow and return transactions keep the daily counters that
+    rebuild_stats would compute from the loans.
+    """
+
+    def test_counters_match_a_rebuild(self):
+        user = User.objects.create_user(username="patron", password="x")
+        books = [
+            Book.objects.create(title=f"Book {i}", author="A", isbn=f"978044101359{i}", page_count=1,
+                                description="", total_copies=2, available_copies=2)
+            for i in range(2)
+        ]
+        service = BookBorrowService()
+        loan = service.borrow_book(books[0].id, user.id)
+        batch = service.borrow_books([book.id for book in books], user)
+        service.return_book(loan['id'])
+        service.return_books([result['loan']['id'] for result in batch])
+
+        counters = sorted(CirculationStat.objects.values_list('day', 'book_id', 'event', 'count'))
+        self.assertEqual([row[2:] for row in counters if row[1] == books[0].id], [('borrowed', 2), ('returned', 2)])
+        call_command('rebuild_stats', stdout=open(os.devnull, 'w'))
+        self.assertEqual(sorted(CirculationStat.objects.values_list('day', 'book_id', 'event', 'count')), counters)
+
+
+class RecommendationTests(TestCase):
+    """
+    build_recommendations ranks co-borrowed books, and an incremental run
+    leaves the same neighbors a full one would.
+    """
+
+    def test_incremental_build_matches_full_build(self):
+        users = [User.objects.create_user(username=f"patron{i}", password="x") for i in range(3)]
+        books = [
+            Book.objects.create(title=f"Book {i}", author="A", isbn=f"978044101359{i}", page_count=1, description="")
+            for i in range(4)
+        ]
+        for user, borrowed in zip(users, ([0, 1, 2], [0, 1], [0, 2])):
+            for i in borrowed:
+                Loan.objects.create(book=books[i], user=user, status='returned')
+        call_command('build_recommendations', stdout=open(os.devnull, 'w'))
+        similar = RecommendationService().get_similar(books[0].id)
+        self.assertEqual([(row['id'], row['borrowed_together']) for row in similar], [(books[1].id, 2), (books[2].id, 2)])
+
+        Loan.objects.create(book=books[3], user=users[1], status='borrowed')
+        call_command('build_recommendations', stdout=open(os.devnull, 'w'))
+        incremental = sorted(BookRecommendation.objects.values_list('book_id', 'similar_id', 'rank', 'score'))
+        call_command('build_recommendations', '--full', stdout=open(os.devnull, 'w'))
+        self.assertEqual(sorted(BookRecommendation.objects.values_list('book_id', 'similar_id', 'rank', 'score')), incremental)
+        self.assertIn((books[3].id, books[0].id, 1, 1), incremental)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Catalog reads carry an ETag and answer a matching If-None-Match with 304
+    until a book changes.
+    """
+
+    def test_not_modified_until_the_catalog_changes(self):
+        User.objects.create_user(username="patron", password="Passw0rd!x")
+        book = Book.objects.create(title="Dune", author="Herbert", isbn="9780441013593", page_count=1, description="")
+        login = self.client.post('/api/users/login/', {"username": "patron", "password": "Passw0rd!x"}, content_type='application/json')
+        headers = {"Authorization": f"Bearer {login.json()['data']['access_token']}"}
+
+        for url in ('/api/books/list/', '/api/books/search/?q=dune', f'/api/books/{book.id}/'):
+            etag = self.client.get(url, headers=headers)['ETag']
+            response = self.client.get(url, headers={**headers, "If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+
+            BookService().claim_copies([book.id])
+            BookService().release_copies(Counter({book.id: 1}))
+            self.assertEqual(self.client.get(url, headers={**headers, "If-None-Match": etag}).status_code, 200)
+
+    def test_list_is_not_validated_by_date(self):
+        User.objects.create_user(username="patron", password="Passw0rd!x")
+        older = Book.objects.create(title="Dune", author="Herbert", isbn="9780441013593", page_count=1, description="")
+        Book.objects.create(title="Emma", author="Austen", isbn="9780141439587", page_count=1, description="")
+        login = self.client.post('/api/users/login/', {"username": "patron", "password": "Passw0rd!x"}, content_type='application/json')
+        headers = {"Authorization": f"Bearer {login.json()['data']['access_token']}"}
+
+        response = self.client.get('/api/books/list/', headers=headers)
+        self.assertNotIn('Last-Modified', response)
+        # A deletion leaves max(updated_at) unchanged; only the ETag sees it
+        older.delete()
+        since = {**headers, "If-Modified-Since": http_date(time.time() + 60)}
+        self.assertEqual(self.client.get('/api/books/list/', headers=since).status_code, 200)
+        self.assertEqual(self.client.get('/api/books/list/', headers={**headers, "If-None-Match": response['ETag']}).status_code, 200)
+
+
+class InvalidPageTests(TestCase):
+    """
+    Malformed cursors and out-of-range pages are client errors, not 500s.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patron", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertPageNotFound(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+
+    def test_bad_cursor_on_book_list(self):
+        self.assertPageNotFound('/api/books/list/?cursor=garbage')
+
+    def test_search_page_out_of_range(self):
+        Book.objects.create(title="Dune", author="Herbert", isbn="9780441013593", page_count=1, description="")
+        self.assertEqual(self.client.get('/api/books/search/?q=dune').status_code, 200)
+        self.assertPageNotFound('/api/books/search/?q=dune&page=99')
+
+    def test_bad_cursor_on_loan_history(self):
+        self.assertPageNotFound('/api/books/loans/?cursor=garbage')
+
+    def test_bad_cursor_on_hold_list(self):
+        self.assertPageNotFound('/api/books/holds/?cursor=x')
+
+
+def reload_urlconf():
+    """
+    Rebuild the URLconf, which picks the sync or async views on import.
+    """
+    for name in ('apps.books.urls', 'apps.users.urls', settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncViewsTestCase(TestCase):
+    """
+    Serves the read endpoints with their async variants, as asgi.py does.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        reload_urlconf()
+        # Class cleanups run after the settings override is undone
+        cls.addClassCleanup(reload_urlconf)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patron", password="Passw0rd!x")
+        self.headers = self.login("patron")
+
+    def login(self, username) -> dict:
+        response = self.client.post(
+            '/api/users/login/', {"username": username, "password": "Passw0rd!x"}, content_type='application/json'
+        )
+        return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+
+class MetricsTests(SimpleTestCase):
+    """
+    Series recorded per worker, merged across workers and rendered for Prometheus.
+    """
+
+    def test_latencies_fall_in_cumulative_buckets(self):
+        worker = metrics.WorkerMetrics()
+        for seconds in (0.005, 0.006, 0.3, 20.0):
+            worker.record(('book-list', 'GET', '2xx'), seconds, 2, 0.001, 100)
+
+        text = metrics.render_prometheus(worker.snapshot())
+
+        labels = 'view="book-list",method="GET",status="2xx"'
+        # Bounds are inclusive, as "le" says
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.01"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="0.5"}} 3', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="10.0"}} 3', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 4', text)
+        self.assertIn(f'http_request_duration_seconds_sum{{{labels}}} 20.311000', text)
+        self.assertIn(f'http_request_db_queries_total{{{labels}}} 8', text)
+        self.assertIn(f'http_response_bytes_total{{{labels}}} 400', text)
+        self.assertIn('# TYPE http_requests_total counter', text)
+
+    def test_timer_is_usable_as_an_execute_wrapper(self):
+        # bench_api wraps connections with a QueryTimer of its own
+        timer = metrics.QueryTimer()
+        self.assertEqual(timer(lambda *args: "rows", "SELECT 1", None, False, {}), "rows")
+        self.assertEqual(timer.count, 1)
+
+    def test_threads_of_a_worker_are_merged(self):
+        worker = metrics.WorkerMetrics()
+        worker.record(('book-list', 'GET', '2xx'), 0.01, 1, 0.001, 10)
+        thread = threading.Thread(target=worker.record, args=(('book-list', 'GET', '2xx'), 0.01, 2, 0.001, 10))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(worker.snapshot()[('book-list', 'GET', '2xx')][metrics.QUERIES], 3)
+
+    def test_other_workers_snapshots_are_added(self):
+        worker = metrics.WorkerMetrics()
+        worker.record(('book-list', 'GET', '2xx'), 0.01, 3, 0.001, 10)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            other = metrics.WorkerMetrics()
+            other.record(('book-list', 'GET', '2xx'), 0.01, 4, 0.001, 10)
+            other.record(('loan-book', 'POST', '4xx'), 0.01, 1, 0.001, 10)
+            with open(os.path.join(directory, "worker-1.json"), 'w') as f:
+                json.dump([[list(key), series] for key, series in other.snapshot().items()], f)
+            # A torn or foreign file is skipped, and this worker's own file is
+            # stale, so its live numbers are used instead
+            with open(os.path.join(directory, "worker-2.json"), 'w') as f:
+                f.write("[[")
+            with open(os.path.join(directory, f"worker-{os.getpid()}.json"), 'w') as f:
+                json.dump([[["book-list", "GET", "2xx"], [100] * metrics.SERIES_SIZE]], f)
+
+            with mock.patch.object(metrics, 'worker_metrics', worker):
+                merged = metrics._load_worker_snapshots()
+
+        self.assertEqual(merged[('book-list', 'GET', '2xx')][metrics.COUNT], 2)
+        self.assertEqual(merged[('book-list', 'GET', '2xx')][metrics.QUERIES], 7)
+        self.assertEqual(merged[('loan-book', 'POST', '4xx')][metrics.COUNT], 1)
+
+
+class AsyncQueryMetricsTests(AsyncViewsTestCase):
+    """
+    Queries that async views run through sync_to_async are counted too.
+    """
+
+    def queries(self) -> int:
+        return metrics.worker_metrics.snapshot().get(('book-list', 'GET', '2xx'), [0] * metrics.SERIES_SIZE)[metrics.QUERIES]
+
+    async def test_async_view_queries_are_recorded(self):
+        before = self.queries()
+        response = await self.async_client.get('/api/books/list/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(self.queries(), before)
+
+
+class AsyncReadViewTests(AsyncViewsTestCase):
+    """
+    The async read views answer as their sync variants do.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.books = [
+            Book.objects.create(title=title, author="Author", isbn=isbn, page_count=1, description="")
+            for title, isbn in (("Dune", "9780441013593"), ("Emma", "9780141439587"), ("Ulysses", "9780141182803"))
+        ]
+        self.loans = [Loan.objects.create(book=book, user=self.user) for book in self.books[:2]]
+        self.staff = User.objects.create_user(username="librarian", password="Passw0rd!x", is_staff=True)
+
+    async def get(self, url, headers=None):
+        return await self.async_client.get(url, headers=self.headers if headers is None else headers)
+
+    def test_read_endpoints_are_served_async(self):
+        for url, view in (
+            ('/api/books/list/', AsyncBookListView),
+            ('/api/books/search/', AsyncBookSearchView),
+            ('/api/books/loans/', AsyncLoanHistoryView),
+            ('/api/books/loans/all/', AsyncStaffLoanHistoryView),
+            ('/api/books/loans/1/', AsyncLoanDetailView),
+        ):
+            self.assertIs(resolve(url).func.view_class, view)
+
+    async def test_next_links_walk_every_page(self):
+        titles, url = [], '/api/books/list/?page_size=2'
+        while url:
+            response = await self.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles += [book['title'] for book in response.json()['data']['books']]
+            url = response.json()['data']['next']
+        self.assertEqual(titles, ["Ulysses", "Emma", "Dune"])
+
+        response = await self.get('/api/books/loans/?page_size=1')
+        self.assertEqual(len(response.json()['data']['loans']), 1)
+        response = await self.get(response.json()['data']['next'])
+        self.assertEqual(len(response.json()['data']['loans']), 1)
+        self.assertIsNone(response.json()['data']['next'])
+
+    async def test_bad_pages_are_404(self):
+        for url in ('/api/books/list/?cursor=garbage', '/api/books/loans/?cursor=garbage', '/api/books/search/?q=dune&page=99'):
+            response = await self.get(url)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json()['message'], "Page not found")
+        self.assertEqual((await self.get('/api/books/search/')).status_code, 400)
+        self.assertEqual((await self.get('/api/books/loans/?status=lost-in-space')).status_code, 400)
+
+    async def test_permissions(self):
+        self.assertEqual((await self.get('/api/books/list/', headers={})).status_code, 401)
+        self.assertEqual((await self.get('/api/books/loans/all/')).status_code, 403)
+        self.assertEqual((await self.get(f'/api/books/loans/{self.loans[0].id}/')).status_code, 200)
+        self.assertEqual((await self.get('/api/books/loans/999999/')).status_code, 404)
+
+        other = await User.objects.acreate(username="other")
+        loan = await Loan.objects.acreate(book=self.books[2], user=other)
+        self.assertEqual((await self.get(f'/api/books/loans/{loan.id}/')).status_code, 403)
+
+        staff = await sync_to_async(self.login)("librarian")
+        self.assertEqual((await self.get(f'/api/books/loans/{loan.id}/', headers=staff)).status_code, 200)
+        response = await self.get(f'/api/books/loans/all/?user_id={other.id}', headers=staff)
+        self.assertEqual([row['id'] for row in response.json()['data']['loans']], [loan.id])
+
+    async def test_unchanged_catalog_is_304(self):
+        for url in ('/api/books/list/', '/api/books/search/?q=dune'):
+            etag = (await self.get(url))['ETag']
+            self.assertEqual((await self.get(url, headers={**self.headers, "If-None-Match": etag})).status_code, 304)
+
+
+class ImportBooksTests(TestCase):
+    """
+    import_books streams rows in batches, rejects bad ones and resumes from
+    its checkpoint.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, text) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def run_import(self, path, *args):
+        call_command('import_books', path, '--batch-size', '2', *args, stdout=StringIO())
+
+    def rejects(self, path) -> dict:
+        with open(f"{path}.rejects.jsonl") as f:
+            return {row['row']: row['errors'] for row in map(json.loads, f)}
+
+    def test_malformed_csv_rows_are_rejected(self):
+        path = self.write("books.csv", (
+            "title,author,isbn,page_count,description\n"
+            "Dune,Frank Herbert,978-0-441-01359-3,412,\"Arrakis,\nspice\"\n"
+            "Emma,Jane Austen,9780141439587,many,Highbury\n"
+            "Ulysses,James Joyce,9780141182804,730,Dublin\n"
+            ",Anonymous,0141182806,10,Dublin\n"
+        ))
+
+        self.run_import(path)
+
+        self.assertEqual(Book.objects.get(isbn="9780441013593").description, "Arrakis,\nspice")
+        self.assertEqual(Book.objects.count(), 1)
+        rejects = self.rejects(path)
+        self.assertEqual(sorted(rejects), [2, 3, 4])
+        self.assertIn("page_count", rejects[2])
+        self.assertIn("isbn", rejects[3])
+        self.assertIn("title", rejects[4])
+
+    def test_malformed_jsonl_rows_are_rejected(self):
+        path = self.write("books.jsonl", "\n".join([
+            json.dumps({"title": "Dune", "author": "Frank Herbert", "isbn": "9780441013593", "page_count": 412, "description": "Arrakis", "total_copies": 3}),
+            '{"title": "Emma",',
+            "[1, 2]",
+            json.dumps({"title": "Ulysses", "author": "James Joyce", "isbn": "9780141182803", "page_count": 730, "description": "Dublin"}),
+        ]) + "\n")
+
+        self.run_import(path)
+
+        dune = Book.objects.get(isbn="9780441013593")
+        self.assertEqual((dune.total_copies, dune.available_copies), (3, 3))
+        self.assertTrue(Book.objects.filter(isbn="9780141182803").exists())
+        rejects = self.rejects(path)
+        self.assertEqual(sorted(rejects), [2, 3])
+        self.assertIn("json", rejects[2])
+        self.assertIn("row", rejects[3])
+
+    def test_duplicate_isbns_are_rejected(self):
+        Book.objects.create(title="Dune", author="Frank Herbert", isbn="9780441013593", page_count=412, description="")
+        path = self.write("books.csv", (
+            "title,author,isbn,page_count,description\n"
+            "Dune again,Frank Herbert,0441013597,412,Arrakis\n"
+            "Emma,Jane Austen,9780141439587,474,Highbury\n"
+            "Emma copy,Jane Austen,978-0-14-143958-7,474,Highbury\n"
+        ))
+
+        self.run_import(path)
+
+        self.assertEqual(Book.objects.get(isbn="9780141439587").title, "Emma")
+        self.assertEqual(Book.objects.count(), 2)
+        rejects = self.rejects(path)
+        self.assertEqual(sorted(rejects), [1, 3])
+        self.assertEqual(rejects[1], {"isbn": ["Book with this ISBN already exists"]})
+
+    def test_interrupted_import_resumes_without_duplicates_or_gaps(self):
+        isbns = ["9780441013593", "9780141439587", "9780141182803", "9780141439518", "9780743273565"]
+        rows = [f"Book {i},Author,{isbn},100,Text" for i, isbn in enumerate(isbns)]
+        rows.insert(3, "Broken,Author,not-an-isbn,100,Text")
+        path = self.write("books.csv", "title,author,isbn,page_count,description\n" + "\n".join(rows) + "\n")
+
+        # The second batch (rows 3 and 4) fails while inserting
+        real_bulk_create = Book.objects.bulk_create
+        batches = []
+
+        def crash_on_second_batch(books):
+            batches.append(books)
+            if len(batches) == 2:
+                raise OSError("connection lost")
+            return real_bulk_create(books)
+
+        with mock.patch.object(Book.objects, 'bulk_create', side_effect=crash_on_second_batch):
+            with self.assertRaises(OSError):
+                self.run_import(path)
+        self.assertEqual(Book.objects.count(), 2)
+        with open(f"{path}.checkpoint.json") as f:
+            self.assertEqual(json.load(f)['rows'], 2)
+
+        self.run_import(path, '--resume')
+
+        self.assertEqual(sorted(Book.objects.values_list('isbn', flat=True)), sorted(isbns))
+        with open(f"{path}.rejects.jsonl") as f:
+            self.assertEqual([json.loads(line)['row'] for line in f], [4])
+        with open(f"{path}.checkpoint.json") as f:
+            self.assertEqual(json.load(f), {"rows": 6, "imported": 5, "rejected": 1})
+
+
+class ExportTests(TestCase):
+    """
+    Full and incremental exports, over the API and from export_catalog.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="librarian", password="x", is_staff=True))
+        self.old = Book.objects.create(title="Dune", author="Frank Herbert", isbn="9780441013593", page_count=412, description="Arrakis")
+        self.new = Book.objects.create(title="Emma, a novel", author="Jane Austen", isbn="9780141439587", page_count=474, description="Highbury")
+        Book.objects.filter(id=self.old.id).update(updated_at=timezone.make_aware(datetime(2023, 6, 1)))
+
+    def export(self, url) -> str:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_and_csv(self):
+        rows = [json.loads(line) for line in self.export('/api/books/export/books/').splitlines()]
+        self.assertEqual([row['title'] for row in rows], ["Dune", "Emma, a novel"])
+        self.assertEqual(rows[0]['isbn'], "9780441013593")
+
+        lines = self.export('/api/books/export/books/?output=csv').splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'title', 'author'])
+        self.assertTrue(lines[2].startswith(f'{self.new.id},"Emma, a novel",Jane Austen,'))
+
+    def test_since_limits_rows_and_reads_naive_values_as_local_time(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            body = self.export('/api/books/export/books/?since=2024-01-01T00:00:00')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.new.id])
+        self.assertEqual([w for w in caught if issubclass(w.category, RuntimeWarning)], [])
+
+        body = self.export('/api/books/export/books/?since=2023-01-01T00:00:00%2B05:30')
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_bad_parameters_are_400(self):
+        for query in ('since=yesterday', 'since=2024-13-01T00:00:00', 'output=xml'):
+            response = self.client.get(f'/api/books/export/loans/?{query}')
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json()['success'])
+
+    def test_patrons_cannot_export(self):
+        self.client.force_authenticate(User.objects.create_user(username="patron", password="x"))
+        self.assertEqual(self.client.get('/api/books/export/books/').status_code, 403)
+
+    def test_export_catalog_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "books.csv")
+            call_command('export_catalog', 'books', '--format', 'csv', '--since', '2024-01-01T00:00:00', '--output', path)
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual([row[1] for row in rows], ['title', "Emma, a novel"])
+
+        for since in ('yesterday', '2024-13-01T00:00:00'):
+            with self.assertRaises(CommandError):
+                call_command('export_catalog', 'books', '--since', since)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """
+    DATABASES built from DB_* environment variables for production.
+    """
+
+    def env(self, **values):
+        environ = {key: value for key, value in os.environ.items() if not key.startswith('DB_')}
+        return mock.patch.dict(os.environ, {**environ, **values}, clear=True)
+
+    def test_sqlite_is_the_default(self):
+        with self.env():
+            database = database_from_env('/srv/library/db.sqlite3')
+        self.assertEqual(database['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(database['NAME'], '/srv/library/db.sqlite3')
+        self.assertEqual(database['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(database['OPTIONS']['timeout'], 5.0)
+        pragmas = database['OPTIONS']['init_command'].split('; ')
+        self.assertIn("PRAGMA journal_mode=WAL", pragmas)
+        self.assertIn("PRAGMA busy_timeout=5000", pragmas)
+
+        with self.env(DB_ENGINE="sqlite", DB_NAME="/data/library.sqlite3", DB_BUSY_TIMEOUT_MS="250"):
+            database = database_from_env('/srv/library/db.sqlite3')
+        self.assertEqual(database['NAME'], '/data/library.sqlite3')
+        self.assertEqual(database['OPTIONS']['timeout'], 0.25)
+        self.assertIn("PRAGMA busy_timeout=250", database['OPTIONS']['init_command'])
+
+    def test_postgresql_with_and_without_the_pool(self):
+        with self.env(DB_ENGINE="postgresql", DB_NAME="library", DB_USER="app"):
+            database = database_from_env('/unused')
+        self.assertEqual(database['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(
+            (database['NAME'], database['USER'], database['PASSWORD'], database['HOST'], database['PORT']),
+            ("library", "app", "", "localhost", "5432"),
+        )
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS']['pool'], {'min_size': 2, 'max_size': 10, 'timeout': 10})
+
+        with self.env(DB_ENGINE="postgresql", DB_NAME="library", DB_USER="app", DB_POOL="false", DB_CONN_MAX_AGE="30"):
+            database = database_from_env('/unused')
+        self.assertNotIn('pool', database['OPTIONS'])
+        self.assertEqual(database['CONN_MAX_AGE'], 30)
+
+    def test_unknown_engine_is_refused(self):
+        with self.env(DB_ENGINE="mysql"), self.assertRaises(ValueError):
+            database_from_env('/unused')
+
+    def test_replica_aliases(self):
+        with self.env():
+            self.assertEqual(replicas_from_env(), {})
+
+        with self.env(DB_ENGINE="postgresql", DB_NAME="library", DB_USER="app", DB_REPLICAS="db-r1:6432, db-r2,"):
+            replicas = replicas_from_env()
+        self.assertEqual(list(replicas), ['replica_1', 'replica_2'])
+        self.assertEqual((replicas['replica_1']['HOST'], replicas['replica_1']['PORT']), ("db-r1", "6432"))
+        self.assertEqual((replicas['replica_2']['HOST'], replicas['replica_2']['PORT']), ("db-r2", "5432"))
+        self.assertEqual(replicas['replica_2']['USER'], "app")
+        self.assertEqual(replicas['replica_1']['TEST'], {'MIRROR': 'default'})
+
+        with self.env(DB_REPLICAS="/data/replica.sqlite3"):
+            replicas = replicas_from_env()
+        self.assertEqual(replicas['replica_1']['NAME'], "/data/replica.sqlite3")
+        self.assertEqual(replicas['replica_1']['ENGINE'], 'django.db.backends.sqlite3')
+
+
+class SearchTests(TestCase):
+    """
+    Ranked full-text search, and the index following writes to books.
+    """
+
+    def setUp(self):
+        self.backend = get_search_backend()
+        self.by_title = Book.objects.create(
+            title="Herbert's Garden", author="Ann Other", isbn="9780441013593", page_count=1, description="Flowers"
+        )
+        self.by_author = Book.objects.create(
+            title="Dune", author="Frank Herbert", isbn="9780141439587", page_count=1, description="Spice"
+        )
+        self.by_description = Book.objects.create(
+            title="Sandworms", author="Jo Smith", isbn="9780141182803", page_count=1, description="On Herbert"
+        )
+
+    def search(self, query) -> list:
+        return [book.id for book in self.backend.search(query)[0:10]]
+
+    def test_title_outranks_author_outranks_description(self):
+        self.assertEqual(self.search("herbert"), [self.by_title.id, self.by_author.id, self.by_description.id])
+        # The last word matches as a prefix, earlier ones as whole words
+        self.assertEqual(self.search("frank herb"), [self.by_author.id])
+        self.assertEqual(self.search("fra herbert"), [])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        book = Book.objects.create(title="Foundation", author="Isaac Asimov", isbn="9780553293357", page_count=1, description="Psychohistory")
+        self.assertEqual(self.search("foundation"), [book.id])
+
+        book.title = "Second Foundation"
+        book.save()
+        self.assertEqual(self.search("second"), [book.id])
+
+        Book.objects.filter(id=book.id).update(author="Robert Heinlein", description="Starships")
+        self.assertEqual(self.search("asimov"), [])
+        self.assertEqual(self.search("psychohistory"), [])
+        self.assertEqual(self.search("heinlein starships"), [book.id])
+
+        # Copy counters do not touch the index
+        Book.objects.filter(id=book.id).update(available_copies=0)
+        self.assertEqual(self.search("heinlein"), [book.id])
+
+        book.delete()
+        self.assertEqual(self.search("foundation"), [])
+        self.assertEqual(self.backend.search("foundation").count(), 0)
+
+    def test_punctuation_only_query_matches_nothing(self):
+        for query in ('!!!', '"*', '- -'):
+            self.assertEqual(self.backend.search(query).count(), 0)
+            self.assertEqual(self.search(query), [])
+        # FTS5 syntax in user input is matched as plain words
+        self.assertEqual(self.search('dune" OR "garden'), [])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="patron", password="x"))
+        response = client.get('/api/books/search/', {'q': '?!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['data']['books'], response.json()['data']['count']), ([], 0))
+
+    def test_flush_clears_the_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO books_book_fts(rowid, title, author, description) VALUES (999999, 'Ghost', '', '')"
+            )
+        self.assertEqual(self.backend.search("ghost").count(), 1)
+
+        call_command('flush', interactive=False, verbosity=0)
+
+        self.assertEqual(self.backend.search("ghost").count(), 0)
+        self.assertEqual(self.backend.search("herbert").count(), 0)
+
+
+class LoanHistoryTests(TestCase):
+    """
+    Loan history pages cost one query however many loans they hold, and
+    patrons only ever see their own loans.
+    """
+
+    def setUp(self):
+        self.patron = User.objects.create_user(username="patron", password="x")
+        self.other = User.objects.create_user(username="other", password="x")
+        self.staff = User.objects.create_user(username="librarian", password="x", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.patron)
+
+        books = Book.objects.bulk_create([
+            Book(title=f"Book {i}", author="Author", isbn=isbn, page_count=1, description="")
+            for i, isbn in enumerate(("9780441013593", "9780141439587", "9780141182803", "9780141439518", "9780743273565"))
+        ])
+        now = timezone.now()
+        self.loans = Loan.objects.bulk_create([
+            Loan(book=book, user=self.patron, status='returned' if i % 2 else 'borrowed') for i, book in enumerate(books)
+        ])
+        # borrowed_at is set on insert; Book i was borrowed i days ago
+        for i, loan in enumerate(self.loans):
+            Loan.objects.filter(id=loan.id).update(borrowed_at=now - timedelta(days=i))
+        self.others_loan = Loan.objects.create(book=books[0], user=self.other)
+
+    def history(self, url, **params) -> list:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']['loans']
+
+    def test_a_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            rows = self.history('/api/books/loans/')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row['user'] for row in rows}, {"patron"})
+        self.assertEqual([row['book_title'] for row in rows], [f"Book {i}" for i in range(5)])
+
+        self.client.force_authenticate(self.staff)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.history('/api/books/loans/all/')), 6)
+
+    def test_patrons_see_only_their_own_loans(self):
+        self.assertNotIn(self.others_loan.id, [row['id'] for row in self.history('/api/books/loans/')])
+        # user_id is a staff filter; patrons stay scoped to themselves
+        self.assertEqual(len(self.history('/api/books/loans/', user_id=self.other.id)), 5)
+        self.assertEqual(self.client.get('/api/books/loans/all/').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/books/loans/{self.others_loan.id}/').status_code, 403)
+        self.assertEqual(self.client.get(f'/api/books/loans/{self.loans[0].id}/').status_code, 200)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual([row['id'] for row in self.history('/api/books/loans/all/', user_id=self.other.id)], [self.others_loan.id])
+        self.assertEqual(self.client.get(f'/api/books/loans/{self.others_loan.id}/').status_code, 200)
+
+    def test_filters(self):
+        self.assertEqual(
+            [row['id'] for row in self.history('/api/books/loans/', status='returned')],
+            [self.loans[1].id, self.loans[3].id],
+        )
+        cutoff = (timezone.now() - timedelta(days=2, hours=12)).isoformat()
+        self.assertEqual(len(self.history('/api/books/loans/', borrowed_after=cutoff)), 3)
+        self.assertEqual(len(self.history('/api/books/loans/', borrowed_before=cutoff)), 2)
+
+        response = self.client.get('/api/books/loans/', {'status': 'overdue', 'borrowed_after': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['data']['errors']), {'status', 'borrowed_after'})
+
+
+class ISBNEndpointTests(TestCase):
+    """
+    Any ISBN-10 or ISBN-13 spelling finds the stored ISBN-13.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="librarian", password="x", is_staff=True))
+        self.dune = Book.objects.create(title="Dune", author="Frank Herbert", isbn="9780441013593", page_count=412, description="")
+
+    def test_lookup_by_isbn10_or_isbn13(self):
+        for isbn in ('0441013597', '0-441-01359-7', '978-0-441-01359-3'):
+            response = self.client.get(f'/api/books/isbn/{isbn}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['data']['book']['id'], self.dune.id)
+
+        self.assertEqual(self.client.get('/api/books/isbn/9780141439587/').status_code, 404)
+        response = self.client.get('/api/books/isbn/0441013598/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], "Invalid ISBN")
+
+    def test_bulk_resolve_known_unknown_and_invalid(self):
+        isbns = ['0441013597', '9780141439587', 'not-an-isbn', '978-0-441-01359-3']
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/books/isbn/resolve/', {'isbns': isbns}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()['data']['results']
+        self.assertEqual([result['isbn'] for result in results], isbns)
+        self.assertEqual(
+            [result['normalized_isbn'] for result in results],
+            ['9780441013593', '9780141439587', None, '9780441013593'],
+        )
+        self.assertEqual(
+            [result['book'] and result['book']['id'] for result in results], [self.dune.id, None, None, self.dune.id]
+        )
+
+        self.assertEqual(self.client.post('/api/books/isbn/resolve/', {'isbns': []}, format='json').status_code, 400)
+
+    def test_adding_a_known_isbn_in_another_spelling_is_400(self):
+        book = {"title": "Dune", "author": "Frank Herbert", "page_count": 412, "description": "Arrakis"}
+        response = self.client.post('/api/books/add/', {**book, "isbn": "0-441-01359-7"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['data']['errors']['isbn'], ["Book with this ISBN already exists"])
+
+        response = self.client.post('/api/books/add/', {**book, "isbn": "0-14-143958-X"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('isbn', response.json()['data']['errors'])
+
+        response = self.client.post('/api/books/add/', {**book, "isbn": "0-14-143958-0"}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['data']['book']['isbn'], "9780141439587")
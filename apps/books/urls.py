@@ -1,15 +1,62 @@
+from django.conf import settings
 from django.urls import path
 
 from apps.books.views import (
+    AsyncBookListView,
+    AsyncBookSearchView,
+    AsyncLoanDetailView,
+    AsyncLoanHistoryView,
+    AsyncStaffLoanHistoryView,
+    BatchLoanBookView,
+    BatchReturnBookView,
+    BookDetailView,
+    BookISBNLookupView,
+    BookISBNResolveView,
     BookListView,
+    BookSearchView,
+    CancelHoldView,
+    CirculationStatsView,
+    ExportView,
+    HoldDetailView,
+    HoldListView,
+    LoanDetailView,
+    LoanHistoryView,
     AddBookView,
     LoanBookView,
+    PlaceHoldView,
     ReturnBookView,
+    SimilarBooksView,
+    StaffLoanHistoryView,
 )
 
+# Under ASGI the read endpoints are served by their async variants
+if settings.ASYNC_VIEWS:
+    BookListView = AsyncBookListView
+    BookSearchView = AsyncBookSearchView
+    LoanHistoryView = AsyncLoanHistoryView
+    StaffLoanHistoryView = AsyncStaffLoanHistoryView
+    LoanDetailView = AsyncLoanDetailView
+
 urlpatterns = [
     path('list/', BookListView.as_view(), name='book-list'),
+    path('search/', BookSearchView.as_view(), name='book-search'),
+    path('isbn/resolve/', BookISBNResolveView.as_view(), name='book-isbn-resolve'),
+    path('isbn/<str:isbn>/', BookISBNLookupView.as_view(), name='book-isbn'),
+    path('<int:book_id>/', BookDetailView.as_view(), name='book-detail'),
+    path('<int:book_id>/similar/', SimilarBooksView.as_view(), name='similar-books'),
     path('add/', AddBookView.as_view(), name='add-book'),
     path('loan/', LoanBookView.as_view(), name='loan-book'),
     path('return/', ReturnBookView.as_view(), name='return-book'),
+    path('loan/batch/', BatchLoanBookView.as_view(), name='batch-loan-book'),
+    path('return/batch/', BatchReturnBookView.as_view(), name='batch-return-book'),
+    path('loans/', LoanHistoryView.as_view(), name='loan-history'),
+    path('loans/all/', StaffLoanHistoryView.as_view(), name='staff-loan-history'),
+    path('loans/<int:loan_id>/', LoanDetailView.as_view(), name='loan-detail'),
+    path('hold/', PlaceHoldView.as_view(), name='place-hold'),
+    path('holds/', HoldListView.as_view(), name='hold-list'),
+    path('holds/<int:hold_id>/', HoldDetailView.as_view(), name='hold-detail'),
+    path('holds/<int:hold_id>/cancel/', CancelHoldView.as_view(), name='cancel-hold'),
+    path('stats/', CirculationStatsView.as_view(), name='circulation-stats'),
+    path('export/books/', ExportView.as_view(), {'name': 'books'}, name='export-books'),
+    path('export/loans/', ExportView.as_view(), {'name': 'loans'}, name='export-loans'),
 ]
\ No newline at end of file
@@ -1,43 +1,322 @@
 import logging
 import traceback
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from apps.books.exceptions import (
+    BatchConflictError,
+    BookAvailableError,
+    BookNotAvailableError,
+    BookNotFoundError,
+    HoldExistsError,
+    HoldNotWaitingError,
+    InvalidISBNError,
+    LoanNotBorrowedError,
+)
+from apps.books.exports import CONTENT_TYPES, export_queryset, parse_since, stream_rows
+from apps.books.models import Book, Hold, Loan
+from apps.books.pagination import BookCursorPagination, BookSearchPagination, HoldCursorPagination, LoanCursorPagination
+from apps.books.permissions import IsAdminOrReadOnly, IsOwnerOrAdmin
+from apps.books.search import get_search_backend
+from apps.books.services import (
+    BookBorrowService,
+    BookService,
+    HoldService,
+    LoanService,
+    RecommendationService,
+    StatsService,
+)
+from apps.books.serializers import (
+    BatchBorrowSerializer,
+    BatchReturnSerializer,
+    BookListSerializer,
+    BookSerializer,
+    BorrowBookSerializer,
+    HoldFilterSerializer,
+    HoldSerializer,
+    ISBNResolveSerializer,
+    LoanHistoryFilterSerializer,
+    LoanSerializer,
+    StatsFilterSerializer,
+    ValuesSerializer,
+)
 
-from apps.books.models import Book
-from apps.books.permissions import IsAdminOrReadOnly
-from apps.books.services import BookBorrowService, BookService
-from apps.books.serializers import BookSerializer, LoanSerializer
+from library_mgmt.async_views import AsyncAPIView
+from library_mgmt.conditional import make_etag, not_modified, set_validators
+from library_mgmt.renderers import FastJSONRenderer
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+def validation_error_response(errors) -> Response:
+    """
+    400 response listing the errors of a query parameter or filter.
+    """
+    return Response(data={
+        "success": False,
+        "message": "Validation errors",
+        "data": {
+            "errors": errors
+        }
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def list_error_response(e: Exception) -> Response:
+    """
+    Response for an exception raised while listing one page, shared by the
+    sync and async read views: 404 for a bad cursor or page, 500 otherwise.
+    """
+    if isinstance(e, NotFound):
+        return Response(data={
+            "success": False,
+            "message": "Page not found",
+            "data": {
+                "error": str(e.detail)
+            }
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    logger.error(f"Internal server error: {e}")
+    logger.error(traceback.format_exc())
+    return Response(data={
+        "success": False,
+        "message": "Internal server error",
+        "data": {
+            "error": str(e)
+        }
+    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class BookListView(APIView):
     """
-    View for listing all books.
+    View for listing books, one cursor page at a time.
     """
     permission_classes = (IsAuthenticated,)
-    serializer_class = BookSerializer
+    serializer_class = BookListSerializer
+    pagination_class = BookCursorPagination
+    # Rows go straight from .values() to JSON, skipping per-instance serializers
+    values_serializer = ValuesSerializer(BookListSerializer)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def get(self, request):
+        try:
+            # Read the version before the page, so the ETag is never newer than the
+            # data. No Last-Modified: deleting a book leaves max(updated_at) as it was
+            etag = make_etag(request, *BookService().get_catalog_version())
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(self.get_page_queryset(), request, view=self)
+            return self.page_response(paginator, page, etag)
+
+        except Exception as e:
+            return list_error_response(e)
+
+    def get_page_queryset(self):
+        # One page of the catalog, without the description column
+        return self.values_serializer.values(BookService().get_book_list())
+
+    def page_response(self, paginator, page, etag) -> Response:
+        response = Response(data={
+            "success": True,
+            "message": "Books listed",
+            "data": {
+                "books": self.values_serializer.serialize(page),
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link()
+            }
+        }, status=status.HTTP_200_OK)
+        return set_validators(response, etag)
+
+
+class BookSearchView(APIView):
+    """
+    View for ranked full-text search over title, author and description.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BookListSerializer
+    pagination_class = BookSearchPagination
 
     def get(self, request):
         try:
-            
-            # Get all books
-            books = Book.objects.all()
-            serializer = BookSerializer(books, many=True)
-            
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return validation_error_response({"q": ["This query parameter is required."]})
+
+            # The index follows the books table, so the catalog version covers it
+            etag = make_etag(request, *BookService().get_catalog_version())
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            # Fetch one page of ranked matches from the search index
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(get_search_backend().search(query), request, view=self)
+            return self.page_response(paginator, page, etag)
+
+        except Exception as e:
+            return list_error_response(e)
+
+    def page_response(self, paginator, page, etag) -> Response:
+        response = Response(data={
+            "success": True,
+            "message": "Books found",
+            "data": {
+                "books": self.serializer_class(page, many=True).data,
+                "count": paginator.page.paginator.count,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link()
+            }
+        }, status=status.HTTP_200_OK)
+        return set_validators(response, etag)
+
+
+class BookDetailView(APIView):
+    """
+    View for a single book.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BookSerializer
+
+    def get(self, request, book_id):
+        try:
+            book = BookService().get_book_by_id(book_id)
+            etag = make_etag(request, book.id, book.updated_at)
+            response = not_modified(request, etag, book.updated_at)
+            if response is not None:
+                return response
+
+            response = Response(data={
+                "success": True,
+                "message": "Book found",
+                "data": {
+                    "book": self.serializer_class(book).data
+                }
+            }, status=status.HTTP_200_OK)
+            return set_validators(response, etag, book.updated_at)
+
+        except Book.DoesNotExist:
+            return Response(data={
+                "success": False,
+                "message": "Book not found",
+                "data": {
+                    "error": "Book not found"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BookISBNLookupView(APIView):
+    """
+    View for looking up a book by any ISBN-10 or ISBN-13 spelling.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BookSerializer
+
+    def get(self, request, isbn):
+        try:
+            book = BookService().get_book_by_isbn(isbn)
+            etag = make_etag(request, book.id, book.updated_at)
+            response = not_modified(request, etag, book.updated_at)
+            if response is not None:
+                return response
+
+            response = Response(data={
+                "success": True,
+                "message": "Book found",
+                "data": {
+                    "book": self.serializer_class(book).data
+                }
+            }, status=status.HTTP_200_OK)
+            return set_validators(response, etag, book.updated_at)
+
+        except InvalidISBNError as e:
+            return Response(data={
+                "success": False,
+                "message": "Invalid ISBN",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        except Book.DoesNotExist:
+            return Response(data={
+                "success": False,
+                "message": "Book not found",
+                "data": {
+                    "error": "No book with this ISBN"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BookISBNResolveView(APIView):
+    """
+    View for resolving a batch of scanned ISBNs to books.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ISBNResolveSerializer
+
+    def post(self, request):
+        try:
+            # Validate request data
+            serializer = self.serializer_class(data=request.data)
+            if not serializer.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": serializer.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Resolve every ISBN with one query
+            results = BookService().resolve_isbns(serializer.validated_data['isbns'])
+            for result in results:
+                if result["book"] is not None:
+                    result["book"] = BookListSerializer(result["book"]).data
+
             return Response(data={
                 "success": True,
-                "message": "Books listed",
+                "message": "ISBNs resolved",
                 "data": {
-                    "books": serializer.data
+                    "results": results
                 }
             }, status=status.HTTP_200_OK)
-        
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -65,7 +344,7 @@ class AddBookView(APIView):
             # Validate data
             if serializer.is_valid():
                 # Add book
-                book = BookService().create_book(serializer.validated_data['title'], serializer.validated_data['author'], serializer.validated_data['isbn'], serializer.validated_data['page_count'], serializer.validated_data['description'])
+                book = BookService().create_book(serializer.validated_data['title'], serializer.validated_data['author'], serializer.validated_data['isbn'], serializer.validated_data['page_count'], serializer.validated_data['description'], serializer.validated_data.get('total_copies', 1))
                 return Response(data={
                     "success": True,
                     "message": "Book added successfully",
@@ -103,7 +382,17 @@ class LoanBookView(APIView):
     def post(self, request):
         try:
             # Fetch data from request
-            book_id = request.data.get('book_id')
+            serializer = BorrowBookSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": serializer.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            book_id = serializer.validated_data['book_id']
             user_id = request.user.id
 
             # Borrow book
@@ -116,6 +405,24 @@ class LoanBookView(APIView):
                 }
             }, status=status.HTTP_200_OK)
 
+        except BookNotFoundError as e:
+            return Response(data={
+                "success": False,
+                "message": "Book not found",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except BookNotAvailableError as e:
+            return Response(data={
+                "success": False,
+                "message": "Book is already borrowed",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -150,7 +457,167 @@ class ReturnBookView(APIView):
                     "loan": loan
                 }
             }, status=status.HTTP_200_OK)
-        
+
+        except Loan.DoesNotExist:
+            return Response(data={
+                "success": False,
+                "message": "Loan not found",
+                "data": {
+                    "error": "Loan not found"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except LoanNotBorrowedError as e:
+            return Response(data={
+                "success": False,
+                "message": "Loan is not borrowed",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchLoanBookView(APIView):
+    """
+    View for borrowing a cart of books in one request.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BatchBorrowSerializer
+
+    def post(self, request):
+        try:
+            # Validate request data
+            serializer = self.serializer_class(data=request.data)
+            if not serializer.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": serializer.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Borrow books
+            results = BookBorrowService().borrow_books(serializer.validated_data['book_ids'], request.user)
+            return Response(data={
+                "success": True,
+                "message": "Batch borrow processed",
+                "data": {
+                    "results": results
+                }
+            }, status=status.HTTP_200_OK)
+
+        except BatchConflictError as e:
+            return Response(data={
+                "success": False,
+                "message": "Batch conflict",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class BatchReturnBookView(APIView):
+    """
+    View for returning a cart of books in one request.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = BatchReturnSerializer
+
+    def post(self, request):
+        try:
+            # Validate request data
+            serializer = self.serializer_class(data=request.data)
+            if not serializer.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": serializer.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Return books
+            results = BookBorrowService().return_books(serializer.validated_data['loan_ids'])
+            return Response(data={
+                "success": True,
+                "message": "Batch return processed",
+                "data": {
+                    "results": results
+                }
+            }, status=status.HTTP_200_OK)
+
+        except BatchConflictError as e:
+            return Response(data={
+                "success": False,
+                "message": "Batch conflict",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class ExportView(APIView):
+    """
+    View for streaming a full or incremental dump of books or loans.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request, name):
+        try:
+            # Not `format`: DRF reserves that parameter for renderer selection
+            fmt = request.query_params.get('output', 'ndjson')
+            since = request.query_params.get('since')
+            since_value = parse_since(since) if since else None
+
+            if fmt not in CONTENT_TYPES or (since and since_value is None):
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": ["output must be ndjson or csv and since an ISO 8601 datetime"]
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Stream rows straight from the database cursor
+            queryset, fields = export_queryset(name, since_value)
+            response = StreamingHttpResponse(stream_rows(queryset, fields, fmt), content_type=CONTENT_TYPES[fmt])
+            response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+            return response
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -160,4 +627,504 @@ class ReturnBookView(APIView):
                 "data": {
                     "error": str(e)
                 }
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class LoanHistoryView(APIView):
+    """
+    View for listing the caller's own loans, newest first.
+
+    Scoped to the caller by get_user_id(), so no object permission applies.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = LoanSerializer
+    pagination_class = LoanCursorPagination
+    values_serializer = ValuesSerializer(LoanSerializer)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def get_user_id(self, request, filters):
+        return request.user.id
+
+    def get(self, request):
+        try:
+            filters = LoanHistoryFilterSerializer(data=request.query_params)
+            if not filters.is_valid():
+                return validation_error_response(filters.errors)
+
+            # Fetch one page of loans in a single query
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(self.get_page_queryset(request, filters.validated_data), request, view=self)
+            return self.page_response(paginator, page)
+
+        except Exception as e:
+            return list_error_response(e)
+
+    def get_page_queryset(self, request, filters):
+        loans = LoanService().get_loan_history(
+            user_id=self.get_user_id(request, filters),
+            status=filters.get('status'),
+            borrowed_after=filters.get('borrowed_after'),
+            borrowed_before=filters.get('borrowed_before'),
+        )
+        return self.values_serializer.values(loans)
+
+    def page_response(self, paginator, page) -> Response:
+        return Response(data={
+            "success": True,
+            "message": "Loans listed",
+            "data": {
+                "loans": self.values_serializer.serialize(page),
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link()
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class StaffLoanHistoryView(LoanHistoryView):
+    """
+    View for listing every patron's loans, optionally for one user_id.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get_user_id(self, request, filters):
+        return filters.get('user_id')
+
+
+class LoanDetailView(APIView):
+    """
+    View for a single loan, visible to its borrower and to staff.
+    """
+    permission_classes = (IsAuthenticated, IsOwnerOrAdmin)
+    serializer_class = LoanSerializer
+
+    def get(self, request, loan_id):
+        try:
+            loan = LoanService().get_loan_history().get(id=loan_id)
+            self.check_object_permissions(request, loan)
+            return self.loan_response(loan)
+
+        except PermissionDenied:
+            raise
+
+        except Exception as e:
+            return self.error_response(e)
+
+    def loan_response(self, loan) -> Response:
+        return Response(data={
+            "success": True,
+            "message": "Loan found",
+            "data": {
+                "loan": self.serializer_class(loan).data
+            }
+        }, status=status.HTTP_200_OK)
+
+    def error_response(self, e: Exception) -> Response:
+        if isinstance(e, Loan.DoesNotExist):
+            return Response(data={
+                "success": False,
+                "message": "Loan not found",
+                "data": {
+                    "error": "Loan not found"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        logger.error(f"Internal server error: {e}")
+        logger.error(traceback.format_exc())
+        return Response(data={
+            "success": False,
+            "message": "Internal server error",
+            "data": {
+                "error": str(e)
+            }
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class PlaceHoldView(APIView):
+    """
+    View for joining the queue for a book that is out.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = HoldSerializer
+
+    def post(self, request):
+        try:
+            serializer = BorrowBookSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": serializer.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # Place hold, then read it back with its queue position
+            service = HoldService()
+            hold = service.place_hold(serializer.validated_data['book_id'], request.user.id)
+            hold = service.get_holds().get(id=hold.id)
+            return Response(data={
+                "success": True,
+                "message": "Hold placed successfully",
+                "data": {
+                    "hold": self.serializer_class(hold).data
+                }
+            }, status=status.HTTP_201_CREATED)
+
+        except BookNotFoundError as e:
+            return Response(data={
+                "success": False,
+                "message": "Book not found",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except (BookAvailableError, HoldExistsError) as e:
+            return Response(data={
+                "success": False,
+                "message": "Hold not placed",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class HoldListView(APIView):
+    """
+    View for listing the caller's own holds, newest first.
+    """
+    permission_classes = (IsAuthenticated,)
+    serializer_class = HoldSerializer
+    pagination_class = HoldCursorPagination
+
+    def get(self, request):
+        try:
+            filters = HoldFilterSerializer(data=request.query_params)
+            if not filters.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": filters.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            # One page of holds in a single query, positions included
+            holds = HoldService().get_holds(user_id=request.user.id, status=filters.validated_data.get('status'))
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(holds, request, view=self)
+
+            return Response(data={
+                "success": True,
+                "message": "Holds listed",
+                "data": {
+                    "holds": self.serializer_class(page, many=True).data,
+                    "next": paginator.get_next_link(),
+                    "previous": paginator.get_previous_link()
+                }
+            }, status=status.HTTP_200_OK)
+
+        except NotFound as e:
+            return Response(data={
+                "success": False,
+                "message": "Page not found",
+                "data": {
+                    "error": str(e.detail)
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class HoldDetailView(APIView):
+    """
+    View for a single hold and its queue position, visible to its patron
+    and to staff.
+    """
+    permission_classes = (IsAuthenticated, IsOwnerOrAdmin)
+    serializer_class = HoldSerializer
+
+    def get(self, request, hold_id):
+        try:
+            hold = HoldService().get_holds().get(id=hold_id)
+            self.check_object_permissions(request, hold)
+
+            return Response(data={
+                "success": True,
+                "message": "Hold found",
+                "data": {
+                    "hold": self.serializer_class(hold).data
+                }
+            }, status=status.HTTP_200_OK)
+
+        except Hold.DoesNotExist:
+            return Response(data={
+                "success": False,
+                "message": "Hold not found",
+                "data": {
+                    "error": "Hold not found"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except PermissionDenied:
+            raise
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CancelHoldView(APIView):
+    """
+    View for leaving the queue, by the hold's patron or staff.
+    """
+    permission_classes = (IsAuthenticated, IsOwnerOrAdmin)
+    serializer_class = HoldSerializer
+
+    def post(self, request, hold_id):
+        try:
+            service = HoldService()
+            hold = service.get_holds().get(id=hold_id)
+            self.check_object_permissions(request, hold)
+
+            service.cancel_hold(hold.id)
+            return Response(data={
+                "success": True,
+                "message": "Hold cancelled successfully",
+                "data": {
+                    "hold": self.serializer_class(service.get_holds().get(id=hold.id)).data
+                }
+            }, status=status.HTTP_200_OK)
+
+        except Hold.DoesNotExist:
+            return Response(data={
+                "success": False,
+                "message": "Hold not found",
+                "data": {
+                    "error": "Hold not found"
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except HoldNotWaitingError as e:
+            return Response(data={
+                "success": False,
+                "message": "Hold is not waiting",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_409_CONFLICT)
+
+        except PermissionDenied:
+            raise
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CirculationStatsView(APIView):
+    """
+    View for the staff circulation dashboard, read from the daily counters.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request):
+        try:
+            filters = StatsFilterSerializer(data=request.query_params)
+            if not filters.is_valid():
+                return Response(data={
+                    "success": False,
+                    "message": "Validation errors",
+                    "data": {
+                        "errors": filters.errors
+                    }
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            end = filters.validated_data.get('end') or timezone.localdate()
+            start = filters.validated_data.get('start') or end - timedelta(days=29)
+            stats = StatsService().get_stats(start, end, top=filters.validated_data['top'])
+
+            return Response(data={
+                "success": True,
+                "message": "Circulation stats retrieved successfully",
+                "data": {
+                    "stats": stats
+                }
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SimilarBooksView(APIView):
+    """
+    View for the books that borrowers of a book also borrowed.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, book_id):
+        try:
+            similar = RecommendationService().get_similar(book_id)
+
+            return Response(data={
+                "success": True,
+                "message": "Similar books retrieved successfully",
+                "data": {
+                    "book_id": book_id,
+                    "similar": similar
+                }
+            }, status=status.HTTP_200_OK)
+
+        except BookNotFoundError as e:
+            return Response(data={
+                "success": False,
+                "message": "Book not found",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        except Exception as e:
+            logger.error(f"Internal server error: {e}")
+            logger.error(traceback.format_exc())
+            return Response(data={
+                "success": False,
+                "message": "Internal server error",
+                "data": {
+                    "error": str(e)
+                }
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncBookListView(AsyncAPIView, BookListView):
+    """
+    Async variant of BookListView, served when running under ASGI.
+    """
+
+    async def get(self, request):
+        try:
+            etag = make_etag(request, *await sync_to_async(BookService().get_catalog_version)())
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            # Fetch the page with the async ORM
+            paginator = self.pagination_class()
+            page = await paginator.apaginate_queryset(self.get_page_queryset(), request, view=self)
+            return self.page_response(paginator, page, etag)
+
+        except Exception as e:
+            return list_error_response(e)
+
+
+class AsyncBookSearchView(AsyncAPIView, BookSearchView):
+    """
+    Async variant of BookSearchView, served when running under ASGI.
+    """
+
+    async def get(self, request):
+        try:
+            query = request.query_params.get('q', '').strip()
+            if not query:
+                return validation_error_response({"q": ["This query parameter is required."]})
+
+            etag = make_etag(request, *await sync_to_async(BookService().get_catalog_version)())
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            # Search backends run raw SQL, which has no async API, so the
+            # count and page queries go through the sync-to-async executor
+            paginator = self.pagination_class()
+            results = get_search_backend().search(query)
+            page = await sync_to_async(paginator.paginate_queryset)(results, request, view=self)
+            return self.page_response(paginator, page, etag)
+
+        except Exception as e:
+            return list_error_response(e)
+
+
+class AsyncLoanHistoryView(AsyncAPIView, LoanHistoryView):
+    """
+    Async variant of LoanHistoryView, served when running under ASGI.
+    """
+
+    async def get(self, request):
+        try:
+            filters = LoanHistoryFilterSerializer(data=request.query_params)
+            if not filters.is_valid():
+                return validation_error_response(filters.errors)
+
+            # Fetch the page with the async ORM
+            paginator = self.pagination_class()
+            page = await paginator.apaginate_queryset(self.get_page_queryset(request, filters.validated_data), request, view=self)
+            return self.page_response(paginator, page)
+
+        except Exception as e:
+            return list_error_response(e)
+
+
+class AsyncStaffLoanHistoryView(AsyncLoanHistoryView, StaffLoanHistoryView):
+    """
+    Async variant of StaffLoanHistoryView, served when running under ASGI.
+    """
+
+
+class AsyncLoanDetailView(AsyncAPIView, LoanDetailView):
+    """
+    Async variant of LoanDetailView, served when running under ASGI.
+    """
+
+    async def get(self, request, loan_id):
+        try:
+            loan = await LoanService().get_loan_history().aget(id=loan_id)
+            self.check_object_permissions(request, loan)
+            return self.loan_response(loan)
+
+        except PermissionDenied:
+            raise
+
+        except Exception as e:
+            return self.error_response(e)
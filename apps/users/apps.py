@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'apps.users'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_delete, post_save
+
+        from apps.users.signals import invalidate_cached_user
+
+        user_model = get_user_model()
+        post_save.connect(invalidate_cached_user, sender=user_model, dispatch_uid='users.invalidate_cached_user')
+        post_delete.connect(invalidate_cached_user, sender=user_model, dispatch_uid='users.invalidate_cached_user_delete')
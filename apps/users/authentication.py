@@ -0,0 +1,154 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import permissions
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TTL': 30,
+    'SHARED_CACHE': None,
+    'SHARED_TTL': 300,
+    'TRUST_CLAIMS_FOR_SAFE_METHODS': False,
+}
+
+
+def cache_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated users keyed by primary key.
+
+    The first tier is a per-process LRU whose entries expire after TTL
+    seconds; the optional second tier is a Django cache shared by every
+    worker. Invalidation clears the local entry and the shared entry, so
+    other workers can serve a stale user for at most TTL seconds. Ids are
+    keyed as strings because token claims carry them as strings.
+    """
+
+    key_prefix = 'auth-user:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _shared(self, config: dict):
+        return caches[config['SHARED_CACHE']] if config['SHARED_CACHE'] else None
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        config = cache_settings()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+
+        shared = self._shared(config)
+        user = shared.get(f"{self.key_prefix}{user_id}") if shared else None
+        if user is not None:
+            self._store(user_id, user, config)
+            with self._lock:
+                self.shared_hits += 1
+            return user
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, user_id, user):
+        user_id = str(user_id)
+        config = cache_settings()
+        self._store(user_id, user, config)
+        shared = self._shared(config)
+        if shared:
+            shared.set(f"{self.key_prefix}{user_id}", user, config['SHARED_TTL'])
+
+    def _store(self, user_id, user, config: dict):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + config['TTL'])
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > config['MAX_SIZE']:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+        shared = self._shared(cache_settings())
+        if shared:
+            shared.delete(f"{self.key_prefix}{user_id}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else None,
+            }
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users through `user_cache` instead of
+    querying the users table on every request.
+
+    With AUTH_USER_CACHE['TRUST_CLAIMS_FOR_SAFE_METHODS'] enabled, safe
+    (read-only) requests skip the lookup altogether and get a TokenUser built
+    from the token claims, so a deactivated or demoted user keeps read access
+    until their access token expires.
+    """
+
+    safe_method = False
+
+    def authenticate(self, request):
+        # DRF creates a fresh authenticator for every request
+        self.safe_method = request.method in permissions.SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.safe_method and cache_settings()['TRUST_CLAIMS_FOR_SAFE_METHODS']:
+            if api_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken("Token contained no recognizable user identification")
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        elif api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        # Each request gets its own copy so views can never mutate the cached user
+        return copy.copy(user)
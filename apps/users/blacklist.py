@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BlacklistFilter:
+    """
+    Per-process set of blacklisted refresh-token JTIs.
+
+    The set is synced from the blacklist table incrementally: every sync reads
+    only the rows above the highest id seen so far, and at most once per
+    TOKEN_BLACKLIST_REFRESH_INTERVAL seconds. Expired JTIs are dropped, since
+    expired tokens are rejected before the blacklist is consulted.
+
+    A JTI in the set is definitely blacklisted. A JTI missing from the set can
+    have been blacklisted by another worker since the last sync; rotation
+    catches that case because blacklisting the old token then finds the row
+    already present (see TokenRefreshSerializer).
+    """
+
+    def __init__(self):
+        self._expiry = {}
+        self._high_water_mark = 0
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def _refresh_interval(self) -> float:
+        return getattr(settings, 'TOKEN_BLACKLIST_REFRESH_INTERVAL', 2.0)
+
+    def sync(self, force: bool = False):
+        """
+        Pull blacklist rows added since the last sync.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._synced_at is not None and now - self._synced_at < self._refresh_interval():
+                return
+
+            current_time = timezone.now()
+            rows = (
+                BlacklistedToken.objects.filter(id__gt=self._high_water_mark, token__expires_at__gt=current_time)
+                .order_by('id')
+                .values_list('id', 'token__jti', 'token__expires_at')
+            )
+            for row_id, jti, expires_at in rows.iterator():
+                self._expiry[jti] = expires_at
+                self._high_water_mark = row_id
+
+            self._expiry = {jti: expires_at for jti, expires_at in self._expiry.items() if expires_at > current_time}
+            self._synced_at = now
+
+    def add(self, jti: str, expires_at):
+        """
+        Record a JTI blacklisted by this process without waiting for a sync.
+        """
+        with self._lock:
+            self._expiry[jti] = expires_at
+
+    def __contains__(self, jti: str) -> bool:
+        self.sync()
+        return jti in self._expiry
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+blacklist_filter = BlacklistFilter()
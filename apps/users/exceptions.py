@@ -0,0 +1,5 @@
+class HashingBusyError(RuntimeError):
+    """
+    Raised when every password-hashing slot of this worker stays busy for
+    longer than the configured wait.
+    """
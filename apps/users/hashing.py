@@ -0,0 +1,59 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from apps.users.exceptions import HashingBusyError
+
+
+DEFAULTS = {
+    'MAX_CONCURRENT': 1,
+    'WAIT_TIMEOUT': 1.0,
+    'RETRY_AFTER': 1,
+}
+
+
+def hashing_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class HashingGate:
+    """
+    Bounds how many request threads of a worker may hash passwords at once.
+
+    Login and registration queue for up to WAIT_TIMEOUT seconds for one of
+    MAX_CONCURRENT slots, so a short burst waits out the hashes ahead of it,
+    and beyond that fail fast with HashingBusyError. A queued request still
+    holds its thread: keep MAX_CONCURRENT below the worker's thread count and
+    WAIT_TIMEOUT to a few hash durations, or a login burst can tie up every
+    thread and starve the catalog endpoints.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._size = None
+        self.rejected = 0
+
+    def _get_semaphore(self, size: int):
+        with self._lock:
+            if self._semaphore is None or self._size != size:
+                self._semaphore = threading.BoundedSemaphore(size)
+                self._size = size
+            return self._semaphore
+
+    @contextmanager
+    def slot(self):
+        config = hashing_settings()
+        semaphore = self._get_semaphore(config['MAX_CONCURRENT'])
+        if not semaphore.acquire(timeout=config['WAIT_TIMEOUT']):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusyError("Too many concurrent password checks")
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+hashing_gate = HashingGate()
@@ -0,0 +1,100 @@
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library_mgmt.benchmarking import http_request, percentile
+
+
+class Command(BaseCommand):
+    help = 'Measure catalog latency against a running server, alone and during a login storm.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the running server')
+        parser.add_argument('--username', required=True, help='Existing user for catalog requests and logins')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per phase')
+        parser.add_argument('--catalog-clients', type=int, default=4, help='Concurrent catalog readers')
+        parser.add_argument('--login-clients', type=int, default=16, help='Concurrent logins during the storm')
+
+    def handle(self, *args, **options):
+        self.base_url = options['url'].rstrip('/')
+        self.credentials = json.dumps({"username": options['username'], "password": options['password']}).encode()
+
+        status_code, body, _ = self._request('/api/users/login/', self.credentials)
+        if status_code != 200:
+            raise CommandError(f"Login failed with HTTP {status_code}: {body[:200]}")
+        self.access_token = json.loads(body)['data']['access_token']
+
+        baseline = self._run_phase(options, login_clients=0)
+        storm = self._run_phase(options, login_clients=options['login_clients'])
+
+        for name, result in (('baseline', baseline), ('login storm', storm)):
+            self.stdout.write(self._format(name, result))
+
+        if baseline['catalog'] and storm['catalog']:
+            ratio = percentile(storm['catalog'], 99) / percentile(baseline['catalog'], 99)
+            self.stdout.write(self.style.SUCCESS(f"Catalog p99 during the storm is {ratio:.2f}x the baseline"))
+
+    def _request(self, path: str, data: bytes = None):
+        """
+        Send one request and return (status, body, headers).
+        """
+        headers = {"Content-Type": "application/json"}
+        if data is None:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return http_request(f"{self.base_url}{path}", data=data, headers=headers)
+
+    def _run_phase(self, options: dict, login_clients: int) -> dict:
+        """
+        Run catalog readers (and optionally login clients) for one phase and
+        collect catalog latencies plus login outcomes.
+        """
+        deadline = time.monotonic() + options['duration']
+        result = {"catalog": [], "catalog_errors": 0, "logins": 0, "shed": 0, "login_errors": 0}
+        lock = threading.Lock()
+
+        def read_catalog():
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                status_code, _, _ = self._request('/api/books/list/')
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if status_code == 200:
+                        result["catalog"].append(elapsed)
+                    else:
+                        result["catalog_errors"] += 1
+
+        def log_in():
+            while time.monotonic() < deadline:
+                status_code, _, headers = self._request('/api/users/login/', self.credentials)
+                with lock:
+                    if status_code == 200:
+                        result["logins"] += 1
+                    elif status_code == 503:
+                        result["shed"] += 1
+                    else:
+                        result["login_errors"] += 1
+                if status_code == 503:
+                    # Well-behaved clients back off as the server asks
+                    time.sleep(float(headers.get('Retry-After', 1)))
+
+        threads = [threading.Thread(target=read_catalog) for _ in range(options['catalog_clients'])]
+        threads += [threading.Thread(target=log_in) for _ in range(login_clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def _format(self, name: str, result: dict) -> str:
+        samples = result["catalog"]
+        if not samples:
+            return f"{name}: no successful catalog requests ({result['catalog_errors']} errors)"
+        return (
+            f"{name}: catalog n={len(samples)} p50={statistics.median(samples):.1f}ms "
+            f"p99={percentile(samples, 99):.1f}ms errors={result['catalog_errors']}; "
+            f"logins ok={result['logins']} shed={result['shed']} errors={result['login_errors']}"
+        )
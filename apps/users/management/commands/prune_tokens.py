@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Tokens deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        started = time.monotonic()
+        deleted = 0
+
+        # Tokens are issued with a fixed lifetime, so the oldest ids expire
+        # first and walking the primary key finds expired rows straight away
+        expired = OutstandingToken.objects.filter(expires_at__lt=now).order_by('id')
+        while True:
+            token_ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not token_ids:
+                break
+
+            # Deleting the blacklist rows explicitly keeps each batch at two
+            # DELETE statements instead of a cascade collected row by row
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=token_ids).delete()
+                OutstandingToken.objects.filter(id__in=token_ids).delete()
+            deleted += len(token_ids)
+
+            self.stdout.write(f"{deleted} expired tokens deleted")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} expired tokens in {time.monotonic() - started:.2f}s"
+        ))
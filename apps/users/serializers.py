@@ -1,9 +1,15 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 
+from .tokens import LibraryRefreshToken
+
 
 class RegisterUserSerializer(serializers.ModelSerializer):
     """
@@ -35,15 +41,14 @@ class RegisterUserSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        # create_user hashes the password before the single INSERT
+        return User.objects.create_user(
             username=validated_data['username'],
             email=validated_data['email'],
+            password=validated_data['password'],
             first_name=validated_data['first_name'],
             last_name=validated_data['last_name']
         )
-        user.set_password(validated_data['password'])
-        user.save()
-        return user
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -61,5 +66,39 @@ class LoginUserSerializer(serializers.Serializer):
     """
     username = serializers.CharField(required=True)
     password = serializers.CharField(write_only=True, required=True)
-        
-    
\ No newline at end of file
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Serializer for rotating a refresh token.
+
+    The blacklist check on the incoming token is answered from memory. When a
+    worker's filter is behind, blacklisting the old token finds the row
+    already there, and the refresh is rejected as a replay.
+    """
+    token_class = LibraryRefreshToken
+
+    def validate(self, attrs):
+        if not (api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION):
+            return super().validate(attrs)
+
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user_id and not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        _, created = refresh.blacklist()
+        if not created:
+            raise InvalidToken("Token is blacklisted")
+
+        data = {"access": str(refresh.access_token)}
+
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh.outstand()
+        data["refresh"] = str(refresh)
+
+        return data
@@ -0,0 +1,12 @@
+from apps.users.authentication import user_cache
+
+
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop a saved or deleted user from the authentication cache, so password
+    changes and deactivations take effect on the next request.
+    """
+    # Logins only touch last_login, which authentication never reads
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    user_cache.invalidate(instance.pk)
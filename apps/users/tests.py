@@ -1,3 +1,231 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.users.authentication import user_cache
+from apps.users.blacklist import blacklist_filter
+from apps.users.exceptions import HashingBusyError
+from apps.users.hashing import HashingGate, hashing_gate
+from apps.users.tokens import LibraryRefreshToken
+
+
+PASSWORD = "Passw0rd!x"
+
+
+class AuthTestCase(TestCase):
+    """
+    Logs in through the API, so requests authenticate with real tokens.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username="patron", password=PASSWORD)
+
+    def login(self) -> dict:
+        response = self.client.post(
+            '/api/users/login/', {"username": "patron", "password": PASSWORD}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def bearer(self, tokens: dict) -> dict:
+        return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+class UserCacheInvalidationTests(AuthTestCase):
+    """
+    Saving a user evicts it from the authentication cache, so the next
+    request sees the change.
+    """
+
+    def test_deactivated_user_is_rejected(self):
+        headers = self.bearer(self.login())
+        self.assertEqual(self.client.get('/api/users/health/', headers=headers).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/users/health/', headers=headers).status_code, 401)
+
+    def test_demoted_staff_loses_admin_access(self):
+        self.user.is_staff = True
+        self.user.save()
+        headers = self.bearer(self.login())
+        self.assertEqual(self.client.get('/api/users/auth-cache/', headers=headers).status_code, 200)
+
+        self.user.is_staff = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/users/auth-cache/', headers=headers).status_code, 403)
+
+    @override_settings(AUTH_USER_CACHE={'SHARED_CACHE': 'default'})
+    def test_password_change_evicts_both_tiers(self):
+        headers = self.bearer(self.login())
+        self.client.get('/api/users/health/', headers=headers)
+        self.assertIsNotNone(user_cache.get(self.user.pk))
+
+        self.user.set_password("An0ther-Passw0rd")
+        self.user.save()
+
+        self.assertIsNone(user_cache.get(self.user.pk))
+        cached = self.client.get('/api/users/health/', headers=headers).wsgi_request.user
+        self.assertTrue(cached.check_password("An0ther-Passw0rd"))
+
+
+class RefreshBlacklistTests(AuthTestCase):
+    """
+    Blacklisted refresh tokens are refused, whether this worker's JTI filter
+    holds them, reloads them from the table, or has not seen them yet.
+    """
+
+    def setUp(self):
+        super().setUp()
+        blacklist_filter.__init__()
+
+    def refresh(self, token: str):
+        return self.client.post('/api/users/token/refresh/', {"refresh": token}, content_type='application/json')
+
+    def logout(self, tokens: dict):
+        response = self.client.post(
+            '/api/users/logout/', {"refresh_token": tokens['refresh_token']},
+            content_type='application/json', headers=self.bearer(tokens),
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_rotated_token_cannot_be_replayed(self):
+        old = self.login()['refresh_token']
+        rotated = self.refresh(old)
+        self.assertEqual(rotated.status_code, 200)
+
+        self.assertEqual(self.refresh(old).status_code, 401)
+        self.assertEqual(self.refresh(rotated.json()['refresh']).status_code, 200)
+
+    def test_logged_out_token_is_refused_after_a_filter_reload(self):
+        tokens = self.login()
+        self.logout(tokens)
+        self.assertEqual(self.refresh(tokens['refresh_token']).status_code, 401)
+
+        # A fresh worker loads the JTI from the blacklist table
+        blacklist_filter.__init__()
+        blacklist_filter.sync(force=True)
+        self.assertIn(LibraryRefreshToken(tokens['refresh_token'], verify=False)['jti'], blacklist_filter)
+        self.assertEqual(self.refresh(tokens['refresh_token']).status_code, 401)
+
+    def test_worker_behind_the_blacklist_still_refuses(self):
+        tokens = self.login()
+        self.logout(tokens)
+
+        # Another worker that synced just before the logout
+        blacklist_filter.__init__()
+        blacklist_filter._synced_at = time.monotonic()
+        self.assertEqual(len(blacklist_filter), 0)
+        self.assertEqual(self.refresh(tokens['refresh_token']).status_code, 401)
+
+
+class PruneTokensTests(TestCase):
+    """
+    prune_tokens deletes expired tokens with their blacklist rows only.
+    """
+
+    def test_only_expired_tokens_are_deleted(self):
+        user = User.objects.create_user(username="patron", password=PASSWORD)
+        now = timezone.now()
+        expired, live = (
+            OutstandingToken.objects.create(user=user, jti=jti, token="t", created_at=now, expires_at=expires_at)
+            for jti, expires_at in (("expired", now - timedelta(hours=1)), ("live", now + timedelta(hours=1)))
+        )
+        BlacklistedToken.objects.create(token=expired)
+        BlacklistedToken.objects.create(token=live)
+
+        call_command('prune_tokens', stdout=StringIO())
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ["live"])
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), ["live"])
+
+
+class HashingGateTests(SimpleTestCase):
+    """
+    A worker hashes at most MAX_CONCURRENT passwords at once; the rest queue
+    for WAIT_TIMEOUT seconds.
+    """
+
+    def contend(self, gate) -> list:
+        outcome = []
+
+        def enter():
+            try:
+                with gate.slot():
+                    outcome.append("entered")
+            except HashingBusyError:
+                outcome.append("busy")
+
+        thread = threading.Thread(target=enter)
+        thread.start()
+        return outcome, thread
+
+    @override_settings(PASSWORD_HASHING={'MAX_CONCURRENT': 1, 'WAIT_TIMEOUT': 0.0})
+    def test_slot_is_released_on_exit_and_on_error(self):
+        gate = HashingGate()
+        with gate.slot():
+            outcome, thread = self.contend(gate)
+            thread.join()
+        self.assertEqual(outcome, ["busy"])
+        self.assertEqual(gate.rejected, 1)
+
+        with self.assertRaises(ValueError), gate.slot():
+            raise ValueError
+        outcome, thread = self.contend(gate)
+        thread.join()
+        self.assertEqual(outcome, ["entered"])
+
+    @override_settings(PASSWORD_HASHING={'MAX_CONCURRENT': 1, 'WAIT_TIMEOUT': 5.0})
+    def test_queued_request_gets_the_slot_when_it_frees(self):
+        gate = HashingGate()
+        with gate.slot():
+            outcome, thread = self.contend(gate)
+            time.sleep(0.05)
+            self.assertEqual(outcome, [])
+        thread.join()
+        self.assertEqual(outcome, ["entered"])
+        self.assertEqual(gate.rejected, 0)
+
+
+@override_settings(PASSWORD_HASHERS=['apps.users.hashers.TunablePBKDF2PasswordHasher'], PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHashingTests(AuthTestCase):
+    """
+    Login and registration hash through the gate with the tunable hasher.
+    """
+
+    @override_settings(PASSWORD_HASHING={'MAX_CONCURRENT': 1, 'WAIT_TIMEOUT': 0.0, 'RETRY_AFTER': 3})
+    def test_busy_worker_answers_503(self):
+        with hashing_gate.slot():
+            login = self.client.post(
+                '/api/users/login/', {"username": "patron", "password": PASSWORD}, content_type='application/json'
+            )
+            register = self.client.post(
+                '/api/users/register/', {
+                    "username": "reader", "email": "reader@example.com", "first_name": "Avid", "last_name": "Reader",
+                    "password": PASSWORD, "password2": PASSWORD,
+                }, content_type='application/json'
+            )
+        for response in (login, register):
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], "3")
+        self.assertEqual(self.login()['user']['username'], "patron")
+
+    def test_hashes_follow_the_configured_iterations(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+        # A login at a higher cost re-encodes the stored hash
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+        self.login()
@@ -0,0 +1,36 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from apps.users.blacklist import blacklist_filter
+
+
+class LibraryRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the claims TokenUser reads, so read-only
+    requests can be authorised from the token alone when claims are trusted.
+    Access tokens and rotated refresh tokens inherit these claims.
+
+    Blacklist checks go through the in-memory `blacklist_filter`, so a clean
+    token is verified without a query.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in blacklist_filter:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
+        return blacklisted, created
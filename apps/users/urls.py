@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from rest_framework_simplejwt.views import TokenRefreshView
@@ -7,12 +8,19 @@ from apps.users.views import (
     LoginUserView,
     LogoutUserView,
     HealthCheckView,
+    AuthCacheStatsView,
+    AsyncHealthCheckView,
 )
 
+# Under ASGI the health check is served by its async variant
+if settings.ASYNC_VIEWS:
+    HealthCheckView = AsyncHealthCheckView
+
 urlpatterns = [
     path('register/', RegisterUserView.as_view(), name='register'),
     path('login/', LoginUserView.as_view(), name='login'),
     path('logout/', LogoutUserView.as_view(), name='logout'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('health/', HealthCheckView.as_view(), name='health'),
+    path('auth-cache/', AuthCacheStatsView.as_view(), name='auth-cache'),
 ]
\ No newline at end of file
@@ -6,10 +6,15 @@ from django.contrib.auth import authenticate
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 
+from library_mgmt.async_views import AsyncAPIView
+
+from .authentication import user_cache
+from .exceptions import HashingBusyError
+from .hashing import hashing_gate, hashing_settings
 from .serializers import RegisterUserSerializer, LoginUserSerializer, UserSerializer
+from .tokens import LibraryRefreshToken
 
 
 # Configure logging
@@ -31,10 +36,11 @@ class RegisterUserView(APIView):
             # Create user
             if serializer.is_valid():
                 logger.debug("Validated user, creating user...")
-                user = serializer.save()
+                with hashing_gate.slot():
+                    user = serializer.save()
 
                 # Generate JWT tokens
-                token = RefreshToken.for_user(user)
+                token = LibraryRefreshToken.for_user(user)
 
                 # Return response
                 return Response(data={
@@ -55,6 +61,16 @@ class RegisterUserView(APIView):
                 }
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        except HashingBusyError as e:
+            logger.warning(f"{e}, shedding {request.path}")
+            return Response(data={
+                "success": False,
+                "message": "Server busy, retry shortly",
+                "data": {
+                    "errors": [str(e)]
+                }
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": str(hashing_settings()['RETRY_AFTER'])})
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -83,7 +99,8 @@ class LoginUserView(APIView):
             password = serializer.validated_data["password"]
 
             # Authenticate user
-            user = authenticate(username=username, password=password)
+            with hashing_gate.slot():
+                user = authenticate(username=username, password=password)
             
             if not user:
                 logger.error(f"Invalid credentials for user: {username}")
@@ -96,7 +113,7 @@ class LoginUserView(APIView):
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
             # Generate JWT tokens
-            token = RefreshToken.for_user(user)
+            token = LibraryRefreshToken.for_user(user)
 
             # Return response
             return Response(data={
@@ -109,6 +126,16 @@ class LoginUserView(APIView):
                 }
             }, status=status.HTTP_200_OK)
         
+        except HashingBusyError as e:
+            logger.warning(f"{e}, shedding {request.path}")
+            return Response(data={
+                "success": False,
+                "message": "Server busy, retry shortly",
+                "data": {
+                    "errors": [str(e)]
+                }
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": str(hashing_settings()['RETRY_AFTER'])})
+
         except Exception as e:
             logger.error(f"Internal server error: {e}")
             logger.error(traceback.format_exc())
@@ -140,7 +167,7 @@ class LogoutUserView(APIView):
                     }
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            token = RefreshToken(refresh_token)
+            token = LibraryRefreshToken(refresh_token)
             token.blacklist()
 
             return Response(data={
@@ -177,3 +204,32 @@ class HealthCheckView(APIView):
                 "message": "Server is running"
             }
         }, status=status.HTTP_200_OK)
+
+
+class AsyncHealthCheckView(AsyncAPIView, HealthCheckView):
+    """
+    Async variant of HealthCheckView, served when running under ASGI.
+    """
+
+    async def get(self, request):
+        return Response(data={
+            "success": True,
+            "message": "Server is running",
+            "data": {
+                "message": "Server is running"
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class AuthCacheStatsView(APIView):
+    """
+    View for inspecting the authentication user cache of this worker.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(data={
+            "success": True,
+            "message": "Auth cache stats retrieved successfully",
+            "data": user_cache.stats()
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,17 @@
+#!/bin/sh
+# Start gunicorn in WSGI (threaded workers) or ASGI (uvicorn workers) mode
+set -e
+
+# Metrics snapshots of a previous run's workers must not be merged in
+if [ -n "$METRICS_DIR" ]; then
+    rm -rf "$METRICS_DIR"
+fi
+
+COMMON="--bind 0.0.0.0:8000 --workers ${WEB_CONCURRENCY:-4} --timeout 120 --access-logfile - --error-logfile - --log-level info"
+
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    # One event loop per worker; asgi.py enables the async read views
+    exec gunicorn $COMMON --worker-class uvicorn_worker.UvicornWorker library_mgmt.asgi:application
+fi
+
+exec gunicorn $COMMON --threads "${GUNICORN_THREADS:-2}" library_mgmt.wsgi:application
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library_mgmt.settings')
+# Read endpoints switch to their async views when served over ASGI
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
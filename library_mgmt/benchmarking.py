@@ -0,0 +1,55 @@
+import urllib.error
+import urllib.request
+
+
+def percentile(samples: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of a non-empty list of samples.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def http_request(url: str, data: bytes = None, headers: dict = None, timeout: float = 60):
+    """
+    Send one request and return (status, body, headers), without raising on
+    HTTP error statuses.
+    """
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(), e.headers
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float, min_latency_ms: float = 1.0,
+                        min_memory_kib: float = 64.0) -> list:
+    """
+    List the regressions of `results` against `baseline`, both as written by
+    bench_api.
+
+    Latency and memory may grow by `tolerance` (a fraction) and by at least
+    the absolute floor before they count, since sub-millisecond timings are
+    noisy. Query counts are deterministic, so any increase is a regression.
+    """
+    regressions = []
+    for name, base in baseline['endpoints'].items():
+        current = results['endpoints'].get(name)
+        if current is None:
+            regressions.append(f"{name}: missing from results")
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms'):
+            limit = max(base[metric] * (1 + tolerance), base[metric] + min_latency_ms)
+            if current[metric] > limit:
+                regressions.append(f"{name}: {metric} {current[metric]:.2f} > {base[metric]:.2f}")
+        if current['queries_per_request'] > base['queries_per_request'] + 0.01:
+            regressions.append(
+                f"{name}: queries_per_request {current['queries_per_request']:.2f} > {base['queries_per_request']:.2f}"
+            )
+        limit = max(base['peak_memory_kib'] * (1 + tolerance), base['peak_memory_kib'] + min_memory_kib)
+        if current['peak_memory_kib'] > limit:
+            regressions.append(
+                f"{name}: peak_memory_kib {current['peak_memory_kib']:.0f} > {base['peak_memory_kib']:.0f}"
+            )
+    return regressions
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(request, *version) -> str:
+    """
+    Strong ETag for a GET response built from data at `version`.
+
+    The same version yields the same bytes only for the same URL, renderer
+    and user (the browsable API shows who is logged in), so those are
+    part of it too.
+    """
+    key = repr((version, request.build_absolute_uri(), request.accepted_renderer.format, request.user.pk))
+    return f'"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+
+def not_modified(request, etag: str, last_modified=None):
+    """
+    The 304 (or 412) the request's If-None-Match / If-Modified-Since
+    headers call for, or None when the response has to be built.
+
+    Only pass last_modified when it changes with every change to the
+    response; without it If-Modified-Since is ignored.
+    """
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag: str, last_modified=None):
+    """
+    Add ETag and Last-Modified, and have clients revalidate before reuse.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Authenticated data: browsers may keep it, shared caches may not
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,205 @@
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from asgiref.sync import iscoroutinefunction
+from django.utils.decorators import sync_and_async_middleware
+
+
+# (request, perf_counter at start, exceptions whose traceback was logged)
+_request_context = ContextVar('log_request_context', default=None)
+
+access_logger = logging.getLogger('library_mgmt.access')
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the request id, URL name and elapsed time of the current request
+    to every record, and drop tracebacks already logged by this request.
+
+    The service and view layers both log the traceback of the same failure;
+    a traceback counts as a repeat when its exception, or one it was raised
+    from or while handling, has been logged before.
+    """
+
+    def filter(self, record):
+        context = _request_context.get()
+        if context is None:
+            record.request_id = record.view = record.latency_ms = None
+            return True
+
+        request, started, logged = context
+        match = request.resolver_match
+        record.request_id = request.request_id
+        record.view = (match.url_name or match.view_name) if match else None
+        record.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+
+        if record.exc_info:
+            exc = record.exc_info[1]
+        elif isinstance(record.msg, str) and record.msg.startswith('Traceback (most recent call last)'):
+            # logger.error(traceback.format_exc()) inside an except block
+            exc = sys.exc_info()[1]
+        else:
+            return True
+        if exc is None:
+            return True
+
+        chain, link = [], exc
+        while link is not None and len(chain) < 10:
+            chain.append(link)
+            link = link.__cause__ or link.__context__
+        if any(seen is link for link in chain for seen in logged):
+            return False
+        logged.append(exc)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line, with the request fields RequestContextFilter
+    attaches.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, 'request_id', None),
+            "view": getattr(record, 'view', None),
+            "latency_ms": getattr(record, 'latency_ms', None),
+        }
+        for key in ('status', 'method'):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """
+    Hand records to a bounded queue that a listener thread drains into a
+    file, so request threads never wait on the disk.
+
+    When the queue is full, 'drop' discards the record at once and 'block'
+    waits up to block_timeout seconds first. Dropped records are counted and
+    reported in a warning once the queue has room again.
+    """
+
+    def __init__(self, filename, queue_size=10000, overflow='drop', block_timeout=0.05):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.FileHandler(filename, delay=True)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._pid = None
+
+    def setFormatter(self, fmt):
+        # Records are formatted by the target, on the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Merge the arguments while they still hold what they held at call
+        # time; everything else is formatted on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            with self._listener_lock:
+                if self._pid != os.getpid():
+                    # First record in this process (or in a forked worker)
+                    self._listener = _Listener(self.queue, self.target)
+                    self._listener.start()
+                    self._pid = os.getpid()
+        try:
+            if self.overflow == 'block':
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            warning = logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Dropped {dropped} log records: the log queue was full",
+            })
+            try:
+                self.queue.put_nowait(warning)
+            except queue.Full:
+                self.dropped += dropped
+
+    def close(self):
+        # logging.shutdown() calls this at exit; drain what is still queued
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+        self.target.close()
+        super().close()
+
+
+@sync_and_async_middleware
+def request_context_middleware(get_response):
+    """
+    Tag log records of a request with its id (X-Request-ID, or a new one),
+    and log one access record per request at INFO.
+    """
+    def start(request):
+        request.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+        return _request_context.set((request, time.perf_counter(), []))
+
+    def finish(request, response, token):
+        response['X-Request-ID'] = request.request_id
+        if access_logger.isEnabledFor(logging.INFO):
+            access_logger.info(
+                f"{request.method} {request.path} {response.status_code}",
+                extra={'status': response.status_code, 'method': request.method},
+            )
+        _request_context.reset(token)
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = start(request)
+            try:
+                response = await get_response(request)
+            except BaseException:
+                _request_context.reset(token)
+                raise
+            return finish(request, response, token)
+    else:
+        def middleware(request):
+            token = start(request)
+            try:
+                response = get_response(request)
+            except BaseException:
+                _request_context.reset(token)
+                raise
+            return finish(request, response, token)
+    return middleware
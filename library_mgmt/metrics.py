@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+
+# Latency histogram upper bounds in seconds (+Inf is implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Slots of a series: count, latency sum, queries, query time, response bytes,
+# then a non-cumulative count per bucket plus +Inf
+COUNT, LATENCY, QUERIES, QUERY_TIME, BYTES, FIRST_BUCKET = range(6)
+SERIES_SIZE = FIRST_BUCKET + len(BUCKETS) + 1
+
+
+class WorkerMetrics:
+    """
+    Request metrics of one worker process.
+
+    Every thread writes only to its own dict of series, so recording takes
+    no lock; readers merge the per-thread dicts. A daemon thread writes the
+    merged snapshot to METRICS_DIR so /metrics can add up all workers.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._stores = []
+        self._stores_lock = threading.Lock()
+        self._flusher = None
+        self._pid = None
+
+    def _store(self) -> dict:
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = self._local.store = {}
+            # Only a thread's first request takes the lock
+            with self._stores_lock:
+                if self._pid != os.getpid():
+                    # Forked worker: drop the parent's stores and flusher
+                    self._stores, self._flusher, self._pid = [], None, os.getpid()
+                self._stores.append(store)
+                if self._flusher is None and metrics_dir():
+                    self._flusher = threading.Thread(target=self._flush_forever, daemon=True)
+                    self._flusher.start()
+        return store
+
+    def record(self, key: tuple, seconds: float, queries: int, query_seconds: float, size: int):
+        store = self._store()
+        series = store.get(key)
+        if series is None:
+            series = store[key] = [0] * SERIES_SIZE
+        series[COUNT] += 1
+        series[LATENCY] += seconds
+        series[QUERIES] += queries
+        series[QUERY_TIME] += query_seconds
+        series[BYTES] += size
+        series[FIRST_BUCKET + bisect_left(BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Merge the per-thread stores into {key: series}.
+        """
+        merged = {}
+        for store in list(self._stores):
+            for key, series in list(store.items()):
+                total = merged.setdefault(key, [0] * SERIES_SIZE)
+                for i, value in enumerate(series):
+                    total[i] += value
+        return merged
+
+    def flush(self):
+        """
+        Write this worker's snapshot to METRICS_DIR, atomically.
+        """
+        directory = metrics_dir()
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump([[list(key), series] for key, series in self.snapshot().items()], f)
+        os.replace(tmp_path, path)
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 5))
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+worker_metrics = WorkerMetrics()
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and the time spent in them.
+    """
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# Timer of the request being served. sync_to_async copies the context into
+# its thread, so ORM work of async views lands in the same timer
+_active_timer = ContextVar('query_timer', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection; it times a query only
+    while a request's timer is active.
+    """
+    timer = _active_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+# Connections are per thread, so each one gets the wrapper when it connects
+connection_created.connect(install_query_timer, dispatch_uid='metrics.install_query_timer')
+
+
+def _response_size(response) -> int:
+    if response.streaming:
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def _record(request, response, started: float, timer: QueryTimer):
+    match = request.resolver_match
+    key = (
+        (match.url_name or match.view_name) if match else 'unresolved',
+        request.method,
+        f"{response.status_code // 100}xx",
+    )
+    worker_metrics.record(key, time.perf_counter() - started, timer.count, timer.seconds, _response_size(response))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Record latency, query count and time, and response size per URL name.
+    """
+    # Connections opened before this module was imported
+    for alias in connections:
+        install_query_timer(connections[alias])
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            timer = QueryTimer()
+            token = _active_timer.set(timer)
+            try:
+                response = await get_response(request)
+            finally:
+                _active_timer.reset(token)
+            _record(request, response, started, timer)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            timer = QueryTimer()
+            token = _active_timer.set(timer)
+            try:
+                response = get_response(request)
+            finally:
+                _active_timer.reset(token)
+            _record(request, response, started, timer)
+            return response
+    return middleware
+
+
+def _load_worker_snapshots() -> dict:
+    """
+    Add up the snapshot files of every worker, with this worker's own
+    numbers taken live.
+    """
+    merged = {}
+    own = os.getpid()
+    directory = metrics_dir()
+    snapshots = [worker_metrics.snapshot().items()]
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if not name.endswith('.json') or name == f"worker-{own}.json":
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    snapshots.append((tuple(key), series) for key, series in json.load(f))
+            except (OSError, ValueError):
+                continue
+    for items in snapshots:
+        for key, series in items:
+            total = merged.setdefault(key, [0] * SERIES_SIZE)
+            for i, value in enumerate(series):
+                total[i] += value
+    return merged
+
+
+def render_prometheus(merged: dict) -> str:
+    """
+    Render merged series in the Prometheus text exposition format.
+    """
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by URL name.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (view, method, status), series in sorted(merged.items()):
+        labels = f'view="{view}",method="{method}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), series[FIRST_BUCKET:]):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {series[LATENCY]:.6f}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {series[COUNT]}")
+
+    for name, slot, kind, help_text in (
+        ("http_requests_total", COUNT, "counter", "Requests by URL name."),
+        ("http_request_db_queries_total", QUERIES, "counter", "SQL queries issued by requests."),
+        ("http_request_db_seconds_total", QUERY_TIME, "counter", "Time spent in SQL queries."),
+        ("http_response_bytes_total", BYTES, "counter", "Response body bytes sent."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (view, method, status), series in sorted(merged.items()):
+            value = series[slot]
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f'{name}{{view="{view}",method="{method}",status="{status}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint merging every worker's metrics.
+    """
+    return HttpResponse(
+        render_prometheus(_load_worker_snapshots()), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+
+DEFAULTS = {
+    # Seconds a readiness result is served before the checks run again
+    'READINESS_TTL': 5,
+    # Seconds the checks may take before the worker reports not ready
+    'TIMEOUT': 2.0,
+}
+
+# In-process caches have nothing to reach, so they are not checked
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+logger = logging.getLogger(__name__)
+
+LIVE_BODY = json.dumps({"success": True, "message": "Alive", "data": {}}).encode()
+
+
+def probe_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, 'HEALTH_PROBES', {})}
+
+
+def run_checks() -> tuple:
+    """
+    Reach every database and shared cache; return (ready, {name: result}).
+
+    Probes are unauthenticated, so failures are logged and only their type
+    is reported.
+    """
+    results = {}
+    for alias in settings.DATABASES:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            results[f"database:{alias}"] = "ok"
+        except Exception as e:
+            logger.error(f"Readiness check database:{alias} failed: {e}")
+            results[f"database:{alias}"] = f"error: {type(e).__name__}"
+        finally:
+            connections[alias].close_if_unusable_or_obsolete()
+
+    for alias, options in getattr(settings, 'CACHES', {}).items():
+        if options.get('BACKEND') in LOCAL_CACHE_BACKENDS:
+            continue
+        try:
+            caches[alias].get('readyz-probe')
+            results[f"cache:{alias}"] = "ok"
+        except Exception as e:
+            logger.error(f"Readiness check cache:{alias} failed: {e}")
+            results[f"cache:{alias}"] = f"error: {type(e).__name__}"
+
+    return all(result == "ok" for result in results.values()), results
+
+
+class ReadinessCheck:
+    """
+    Readiness of one worker process, recomputed at most every READINESS_TTL
+    seconds.
+
+    The checks run on a dedicated thread with its own connections, so a hung
+    database costs a probe at most TIMEOUT seconds and never more than one
+    check is in flight. Probes in between get the stored response.
+    """
+
+    def __init__(self):
+        self._response = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = None
+        self._pid = None
+
+    def cached(self):
+        """
+        The stored (status, body), or None once it has expired.
+        """
+        if self._response is not None and time.monotonic() - self._checked_at < probe_settings()['READINESS_TTL']:
+            return self._response
+        return None
+
+    def refresh(self) -> tuple:
+        """
+        Run the checks (or wait for the run in flight) and store the result.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's thread does not exist here
+                self._executor, self._pending, self._pid = ThreadPoolExecutor(max_workers=1), None, os.getpid()
+            if self._pending is None or self._pending.done():
+                self._pending = self._executor.submit(run_checks)
+            pending = self._pending
+
+        timeout = probe_settings()['TIMEOUT']
+        try:
+            ready, results = pending.result(timeout=timeout)
+        except TimeoutError:
+            ready, results = False, {"checks": f"timed out after {timeout}s"}
+
+        body = json.dumps({
+            "success": ready,
+            "message": "Ready" if ready else "Not ready",
+            "data": {"checks": results},
+        }).encode()
+        self._response = (200 if ready else 503, body)
+        self._checked_at = time.monotonic()
+        return self._response
+
+
+readiness = ReadinessCheck()
+
+
+def _probe_response(status_code: int, body: bytes) -> HttpResponse:
+    response = HttpResponse(body, status=status_code, content_type='application/json')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@sync_and_async_middleware
+def probe_middleware(get_response):
+    """
+    Answer /livez and /readyz before any other middleware, authentication or
+    URL resolution runs.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if request.path_info == '/livez':
+                return _probe_response(200, LIVE_BODY)
+            if request.path_info == '/readyz':
+                # Only an expired result waits on the checks, off the event loop
+                result = readiness.cached() or await sync_to_async(readiness.refresh, thread_sensitive=False)()
+                return _probe_response(*result)
+            return await get_response(request)
+    else:
+        def middleware(request):
+            if request.path_info == '/livez':
+                return _probe_response(200, LIVE_BODY)
+            if request.path_info == '/readyz':
+                return _probe_response(*(readiness.cached() or readiness.refresh()))
+            return get_response(request)
+    return middleware
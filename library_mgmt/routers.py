@@ -0,0 +1,75 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+
+
+# Apps whose reads may be served by a replica
+REPLICA_APPS = {'books'}
+
+# Set once the current request (or job) has written, or when it is an
+# unsafe request; reads then stay on the primary for read-your-writes
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def pin_to_primary():
+    """
+    Send every remaining read of the current context to the primary.
+    """
+    _pinned.set(True)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route book and loan reads to a random replica from DATABASE_REPLICAS and
+    everything else to the primary ('default').
+
+    Any write pins the rest of the request to the primary, so a request never
+    reads a replica that may lag behind what it just wrote.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if not replicas or _pinned.get() or model._meta.app_label not in REPLICA_APPS:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@sync_and_async_middleware
+def pin_primary_middleware(get_response):
+    """
+    Scope the primary pin to one request, pinning unsafe methods from the
+    start so reads that feed a write (select_for_update included) see the
+    primary.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _pinned.set(request.method not in SAFE_METHODS)
+            try:
+                return await get_response(request)
+            finally:
+                _pinned.reset(token)
+    else:
+        def middleware(request):
+            token = _pinned.set(request.method not in SAFE_METHODS)
+            try:
+                return get_response(request)
+            finally:
+                _pinned.reset(token)
+    return middleware
@@ -1,4 +1,5 @@
 from pathlib import Path
+from decimal import Decimal
 from decouple import config
 from datetime import timedelta
 
@@ -29,6 +30,10 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    # Answers /livez and /readyz before the rest of the stack
+    'library_mgmt.probes.probe_middleware',
+    'library_mgmt.metrics.metrics_middleware',
+    'library_mgmt.log.request_context_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -36,8 +41,25 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'library_mgmt.routers.pin_primary_middleware',
 ]
 
+# Request metrics (library_mgmt.metrics); workers share snapshots through
+# METRICS_DIR so /metrics covers all of them
+METRICS_DIR = config("METRICS_DIR", default="") or None
+METRICS_FLUSH_INTERVAL = 5
+
+# Liveness/readiness probes (library_mgmt.probes); readiness checks the
+# databases and shared caches at most every READINESS_TTL seconds
+HEALTH_PROBES = {
+    'READINESS_TTL': 5,
+    'TIMEOUT': 2.0,
+}
+
+# Database routing; each environment lists its read replicas
+DATABASE_ROUTERS = ['library_mgmt.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+
 # Root URL configuration
 ROOT_URLCONF = 'library_mgmt.urls'
 
@@ -76,6 +98,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing; the PBKDF2 work factor is tunable per environment
+PASSWORD_HASHERS = [
+    'apps.users.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config("PASSWORD_HASH_ITERATIONS", default=0, cast=int) or None
+
+# Password hashing per worker (apps.users.hashing). MAX_CONCURRENT requests
+# hash at once; keep it below gunicorn's --threads so catalog requests always
+# have a free thread. Others queue for up to WAIT_TIMEOUT seconds, about two
+# or three hashes at the configured iterations, before a 503 with Retry-After
+PASSWORD_HASHING = {
+    'MAX_CONCURRENT': config("PASSWORD_HASHING_MAX_CONCURRENT", default=1, cast=int),
+    'WAIT_TIMEOUT': config("PASSWORD_HASHING_WAIT_TIMEOUT", default=1.0, cast=float),
+    'RETRY_AFTER': 1,
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -88,15 +130,31 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
-# Logging
+# Logging; records are queued and written as JSON lines by a background
+# thread (library_mgmt.log), so a slow disk never stalls a request
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {
+            '()': 'library_mgmt.log.RequestContextFilter',
+        },
+    },
+    'formatters': {
+        'json': {
+            '()': 'library_mgmt.log.JSONFormatter',
+        },
+    },
     'handlers': {
         'file': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
+            '()': 'library_mgmt.log.BackgroundQueueHandler',
             'filename': BASE_DIR / 'logs' / 'django_errors.log',
+            'queue_size': config("LOG_QUEUE_SIZE", default=10000, cast=int),
+            # 'drop' or 'block' (for up to block_timeout seconds) when full
+            'overflow': config("LOG_QUEUE_OVERFLOW", default="drop"),
+            'block_timeout': 0.05,
+            'filters': ['request_context'],
+            'formatter': 'json',
         },
     },
     'loggers': {
@@ -105,13 +163,23 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        'apps': {
+            'handlers': ['file'],
+            'level': config("LOG_LEVEL", default="ERROR"),
+            'propagate': False,
+        },
+        'library_mgmt': {
+            'handlers': ['file'],
+            'level': config("LOG_LEVEL", default="ERROR"),
+            'propagate': False,
+        },
     },
 }
 
 # Rest Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -141,4 +209,33 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-}
\ No newline at end of file
+
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.TokenRefreshSerializer',
+}
+
+# Seconds between incremental syncs of each worker's blacklisted-JTI filter
+TOKEN_BLACKLIST_REFRESH_INTERVAL = config("TOKEN_BLACKLIST_REFRESH_INTERVAL", default=2.0, cast=float)
+
+# Serve the read endpoints with async views; asgi.py turns this on
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Authenticated-user cache (apps.users.authentication)
+AUTH_USER_CACHE = {
+    'MAX_SIZE': config("AUTH_USER_CACHE_MAX_SIZE", default=10000, cast=int),
+    # Seconds a worker may serve a user changed through another worker
+    'TTL': config("AUTH_USER_CACHE_TTL", default=30, cast=int),
+    # Optional alias from CACHES shared by all workers
+    'SHARED_CACHE': config("AUTH_USER_CACHE_SHARED", default="") or None,
+    'SHARED_TTL': 300,
+    # Authorise GET/HEAD/OPTIONS from token claims alone, without any user lookup
+    'TRUST_CLAIMS_FOR_SAFE_METHODS': config("AUTH_TRUST_TOKEN_CLAIMS", default=False, cast=bool),
+}
+
+# Circulation settings
+CIRCULATION = {
+    'LOAN_PERIOD_DAYS': config("LOAN_PERIOD_DAYS", default=14, cast=int),
+    'FINE_PER_DAY': config("FINE_PER_DAY", default="0.50", cast=Decimal),
+    'MAX_OVERDUE_FINE': config("MAX_OVERDUE_FINE", default="20.00", cast=Decimal),
+    'LOST_FINE': Decimal("100.00"),
+    'DAMAGED_FINE': Decimal("50.00"),
+}
@@ -0,0 +1,93 @@
+from decouple import config
+
+
+def sqlite_database(name) -> dict:
+    """
+    SQLite tuned for several gunicorn workers sharing one file.
+
+    WAL lets readers run alongside the single writer, busy_timeout makes
+    writers queue for the lock instead of failing, and IMMEDIATE transactions
+    take the write lock at BEGIN so two atomic blocks can never deadlock
+    upgrading from a read lock.
+    """
+    busy_timeout_ms = config("DB_BUSY_TIMEOUT_MS", default=5000, cast=int)
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        # Safe with WAL: a crash can lose the last commits but never corrupts
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={busy_timeout_ms}",
+        f"PRAGMA mmap_size={config('DB_SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int)}",
+        # Negative values are KiB rather than pages
+        f"PRAGMA cache_size=-{config('DB_SQLITE_CACHE_KB', default=64 * 1024, cast=int)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'OPTIONS': {
+            'init_command': '; '.join(pragmas),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': busy_timeout_ms / 1000,
+        },
+    }
+
+
+def postgresql_database() -> dict:
+    """
+    PostgreSQL with Django's native psycopg pool, or persistent connections
+    when DB_POOL is off (Django does not allow both at once).
+    """
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config("DB_NAME"),
+        'USER': config("DB_USER"),
+        'PASSWORD': config("DB_PASSWORD", default=""),
+        'HOST': config("DB_HOST", default="localhost"),
+        'PORT': config("DB_PORT", default="5432"),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+    }
+    if config("DB_POOL", default=True, cast=bool):
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS']['pool'] = {
+            'min_size': config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            'max_size': config("DB_POOL_MAX_SIZE", default=10, cast=int),
+            # Seconds a request waits for a free connection before erroring
+            'timeout': config("DB_POOL_TIMEOUT", default=10, cast=int),
+        }
+    else:
+        database['CONN_MAX_AGE'] = config("DB_CONN_MAX_AGE", default=60, cast=int)
+    return database
+
+
+def database_from_env(default_sqlite_name) -> dict:
+    """
+    Build the default database from DB_ENGINE ('sqlite' or 'postgresql').
+    """
+    engine = config("DB_ENGINE", default="sqlite")
+    if engine == "postgresql":
+        return postgresql_database()
+    if engine == "sqlite":
+        return sqlite_database(config("DB_NAME", default=str(default_sqlite_name)))
+    raise ValueError(f"Unsupported DB_ENGINE: {engine}")
+
+
+def replicas_from_env() -> dict:
+    """
+    Build read replicas, aliased replica_1, replica_2, ...
+
+    DB_REPLICAS lists the replica HOST[:PORT]s for PostgreSQL (sharing the
+    primary's credentials) or the replica file paths for SQLite.
+    """
+    replicas = {}
+    locations = [location.strip() for location in config("DB_REPLICAS", default="").split(",") if location.strip()]
+    for n, location in enumerate(locations, start=1):
+        if config("DB_ENGINE", default="sqlite") == "postgresql":
+            host, _, port = location.partition(":")
+            replica = {**postgresql_database(), 'HOST': host, 'PORT': port or "5432"}
+        else:
+            replica = sqlite_database(location)
+        # Tests run against the primary's test database only
+        replica['TEST'] = {'MIRROR': 'default'}
+        replicas[f"replica_{n}"] = replica
+    return replicas
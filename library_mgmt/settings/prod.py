@@ -1,4 +1,5 @@
 from .base import *
+from .database import database_from_env, replicas_from_env
 
 # Debug mode
 DEBUG = False
@@ -9,10 +10,9 @@ ALLOWED_HOSTS = []
 # Allowed origins
 CORS_ALLOWED_ORIGINS = []
 
-# Database
+# Database, chosen and tuned from the environment (see settings/database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(BASE_DIR / 'db.sqlite3'),
+    **replicas_from_env(),
 }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from library_mgmt.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('apps.users.urls')),
     path('api/books/', include('apps.books.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]